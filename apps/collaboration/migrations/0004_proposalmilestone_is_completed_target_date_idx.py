@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-16 19:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("collaboration", "0003_workflowtemplate_sectionworkflowinstance_and_more"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="proposalmilestone",
+            name="collaborati_is_comp_4b5e65_idx",
+        ),
+        migrations.AddIndex(
+            model_name="proposalmilestone",
+            index=models.Index(
+                fields=["is_completed", "target_date"],
+                name="collaborati_is_comp_3b6ed8_idx",
+            ),
+        ),
+    ]
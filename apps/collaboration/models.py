@@ -291,9 +291,39 @@ class TaskItem(BaseModel):
             models.Index(fields=['assigned_to']),
         ]
     
+    # Fields whose last saved values are kept for change notifications
+    TRACKED_FIELDS = ('status', 'assigned_to_id')
+    
     def __str__(self):
         return f"{self.title} ({self.get_status_display()})"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.loaded_values = instance._tracked_values()
+        return instance
+    
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.loaded_values = self._tracked_values()
+    
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        refreshed = self._tracked_values()
+        if fields is not None:
+            # Fields left out of a partial refresh may hold unsaved edits, so keep their old snapshot
+            fields = set(fields)
+            refreshed = {
+                name: value for name, value in refreshed.items()
+                if name in fields or name.removesuffix('_id') in fields
+            }
+        self.loaded_values = {**getattr(self, 'loaded_values', {}), **refreshed}
+    
+    def _tracked_values(self):
+        """Snapshot the tracked fields that are loaded on this instance"""
+        deferred = self.get_deferred_fields()
+        return {name: getattr(self, name) for name in self.TRACKED_FIELDS if name not in deferred}
+    
     @property
     def is_overdue(self):
         """Check if task is past due date"""
@@ -441,7 +471,7 @@ class ProposalMilestone(BaseModel):
         ordering = ['target_date']
         indexes = [
             models.Index(fields=['team', 'target_date']),
-            models.Index(fields=['is_completed']),
+            models.Index(fields=['is_completed', 'target_date']),
         ]
     
     def __str__(self):
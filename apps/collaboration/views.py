@@ -12,6 +12,7 @@ from django.contrib.auth import get_user_model
 from django.http import JsonResponse, HttpResponse
 from django.views.decorators.http import require_http_methods, require_POST
 from django.contrib import messages
+from django.db import transaction
 from django.db.models import Q, Count, Avg, Sum
 from django.utils import timezone
 from django.core.paginator import Paginator
@@ -498,45 +499,47 @@ def create_comment(request, team_id):
     if not content:
         return JsonResponse({'error': 'Content is required'}, status=400)
     
-    comment = TeamComment.objects.create(
-        team=team,
-        author=request.user,
-        content=content,
-        comment_type=comment_type,
-        subject=subject
-    )
-    
-    # Set optional relationships
-    if parent_id:
-        try:
-            parent = TeamComment.objects.get(id=parent_id, team=team)
-            comment.parent_comment = parent
-        except TeamComment.DoesNotExist:
-            pass
-    
-    if task_id:
-        try:
-            task = TaskItem.objects.get(id=task_id, team=team)
-            comment.task = task
-        except TaskItem.DoesNotExist:
-            pass
-    
-    if section_id:
-        try:
-            section = ProposalSection.objects.get(id=section_id, team=team)
-            comment.section = section
-        except ProposalSection.DoesNotExist:
-            pass
-    
-    comment.save()
-    
-    # Add mentioned users
-    if mentioned_user_ids:
-        mentioned_users = User.objects.filter(
-            id__in=mentioned_user_ids,
-            teammembership__team=team
+    # Notification receivers run on commit, so attach relations and mentions in the same transaction
+    with transaction.atomic():
+        comment = TeamComment.objects.create(
+            team=team,
+            author=request.user,
+            content=content,
+            comment_type=comment_type,
+            subject=subject
         )
-        comment.mentioned_users.set(mentioned_users)
+        
+        # Set optional relationships
+        if parent_id:
+            try:
+                parent = TeamComment.objects.get(id=parent_id, team=team)
+                comment.parent_comment = parent
+            except TeamComment.DoesNotExist:
+                pass
+        
+        if task_id:
+            try:
+                task = TaskItem.objects.get(id=task_id, team=team)
+                comment.task = task
+            except TaskItem.DoesNotExist:
+                pass
+        
+        if section_id:
+            try:
+                section = ProposalSection.objects.get(id=section_id, team=team)
+                comment.section = section
+            except ProposalSection.DoesNotExist:
+                pass
+        
+        comment.save()
+        
+        # Add mentioned users
+        if mentioned_user_ids:
+            mentioned_users = User.objects.filter(
+                id__in=mentioned_user_ids,
+                teammembership__team=team
+            )
+            comment.mentioned_users.set(mentioned_users)
     
     if request.headers.get('HX-Request'):
         context = {'comment': comment, 'team': team}
@@ -987,47 +990,48 @@ def add_inline_comment(request, section_id):
         # Create content hash for version tracking
         content_hash = hashlib.sha256(section.content.encode()).hexdigest()
         
-        # Create inline comment
-        comment = InlineComment.objects.create(
-            section=section,
-            author=request.user,
-            comment_type=data.get('comment_type', 'suggestion'),
-            urgency=data.get('urgency', 'medium'),
-            text_selection=data.get('text_selection', ''),
-            selection_start=int(data.get('selection_start', 0)),
-            selection_end=int(data.get('selection_end', 0)),
-            selection_context=data.get('selection_context', ''),
-            content=data.get('content', ''),
-            suggested_change=data.get('suggested_change', ''),
-            section_version_hash=content_hash,
-        )
-        
-        # Handle mentions
-        mentioned_usernames = data.get('mentioned_users', [])
-        if mentioned_usernames:
-            mentioned_users = section.team.members.filter(
-                username__in=mentioned_usernames
+        # Create the comment, its mentions and thread together so listeners see them at commit
+        with transaction.atomic():
+            comment = InlineComment.objects.create(
+                section=section,
+                author=request.user,
+                comment_type=data.get('comment_type', 'suggestion'),
+                urgency=data.get('urgency', 'medium'),
+                text_selection=data.get('text_selection', ''),
+                selection_start=int(data.get('selection_start', 0)),
+                selection_end=int(data.get('selection_end', 0)),
+                selection_context=data.get('selection_context', ''),
+                content=data.get('content', ''),
+                suggested_change=data.get('suggested_change', ''),
+                section_version_hash=content_hash,
             )
-            comment.mentioned_users.set(mentioned_users)
-        
-        # Handle assignment
-        if data.get('assigned_to'):
-            try:
-                assigned_user = section.team.members.get(id=data['assigned_to'])
-                comment.assigned_to = assigned_user
-                comment.save()
-            except:
-                pass  # Invalid user ID
-        
-        # Create comment thread
-        thread = CommentThread.objects.create(
-            section=section,
-            inline_comment=comment,
-            title=f"{comment.get_comment_type_display()} on {section.title}"
-        )
-        thread.participants.add(request.user)
-        if comment.assigned_to:
-            thread.participants.add(comment.assigned_to)
+            
+            # Handle mentions
+            mentioned_usernames = data.get('mentioned_users', [])
+            if mentioned_usernames:
+                mentioned_users = section.team.members.filter(
+                    username__in=mentioned_usernames
+                )
+                comment.mentioned_users.set(mentioned_users)
+            
+            # Handle assignment
+            if data.get('assigned_to'):
+                try:
+                    assigned_user = section.team.members.get(id=data['assigned_to'])
+                    comment.assigned_to = assigned_user
+                    comment.save()
+                except:
+                    pass  # Invalid user ID
+            
+            # Create comment thread
+            thread = CommentThread.objects.create(
+                section=section,
+                inline_comment=comment,
+                title=f"{comment.get_comment_type_display()} on {section.title}"
+            )
+            thread.participants.add(request.user)
+            if comment.assigned_to:
+                thread.participants.add(comment.assigned_to)
         
         # Return comment data
         response_data = {
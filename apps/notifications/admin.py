@@ -0,0 +1,25 @@
+from django.contrib import admin
+from .models import Notification, NotificationTemplate
+
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ['title', 'recipient_name', 'notification_type', 'priority', 'status', 'created_at']
+    list_filter = ['notification_type', 'priority', 'status', 'created_at']
+    search_fields = ['title', 'recipient_name']
+    raw_id_fields = ['user']
+    date_hierarchy = 'created_at'
+
+    def get_queryset(self, request):
+        # Message bodies and metadata are only needed on the change form
+        return super().get_queryset(request).defer('message', 'metadata')
+
+
+@admin.register(NotificationTemplate)
+class NotificationTemplateAdmin(admin.ModelAdmin):
+    list_display = ['notification_type', 'title_template', 'default_priority', 'is_active']
+    list_filter = ['default_priority', 'is_active']
+    search_fields = ['notification_type', 'title_template']
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).defer('message_template', 'email_body_template')
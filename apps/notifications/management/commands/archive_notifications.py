@@ -0,0 +1,115 @@
+"""
+Management command to archive old notifications by month
+"""
+
+import csv
+import gzip
+import json
+import os
+import tempfile
+from datetime import datetime
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from apps.notifications.models import Notification
+
+
+ARCHIVE_FIELDS = [
+    'id', 'user_id', 'notification_type', 'title', 'message', 'priority',
+    'status', 'content_type_id', 'object_id', 'action_url', 'metadata',
+    'created_at', 'sent_at', 'read_at', 'expires_at',
+]
+
+
+class Command(BaseCommand):
+    help = 'Export notifications older than the retention window to monthly CSV files and remove them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months', type=int, default=12,
+                            help='Keep notifications created within this many months (default: 12)')
+        parser.add_argument('--output-dir', default='.',
+                            help='Directory for the notif_YYYY_MM.csv.gz archive files')
+        parser.add_argument('--batch-size', type=int, default=2000,
+                            help='Rows read and deleted per batch (default: 2000)')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Report what would be archived without writing or deleting anything')
+
+    def handle(self, *args, **options):
+        cutoff = self._month_start(timezone.now(), -options['months'])
+        batch_size = options['batch_size']
+
+        oldest = Notification.objects.filter(created_at__lt=cutoff).order_by('created_at').values_list('created_at', flat=True).first()
+        if oldest is None:
+            self.stdout.write(self.style.SUCCESS('No notifications older than the retention window.'))
+            return
+
+        total = 0
+        month_start = self._month_start(oldest, 0)
+        while month_start < cutoff:
+            month_end = self._month_start(month_start, 1)
+            month = Notification.objects.filter(created_at__gte=month_start, created_at__lt=month_end)
+            count = month.count()
+            if count:
+                label = f'notif_{month_start:%Y_%m}'
+                if options['dry_run']:
+                    self.stdout.write(f'Would archive {count} notifications to {label}.csv.gz')
+                else:
+                    os.makedirs(options['output_dir'], exist_ok=True)
+                    path = self._archive_month(month, options['output_dir'], label, batch_size)
+                    self.stdout.write(self.style.SUCCESS(f'Archived {count} notifications to {path}'))
+                total += count
+            month_start = month_end
+
+        verb = 'Would archive' if options['dry_run'] else 'Archived'
+        self.stdout.write(self.style.SUCCESS(f'\n{verb} {total} notifications created before {cutoff.date()}.'))
+
+    def _archive_month(self, queryset, output_dir, label, batch_size):
+        """
+        Write one month of notifications to a gzipped CSV, then delete them in batches.
+        The file is written under a temporary name and only then moved to a name no earlier
+        run has used, so a rerun after an interrupted purge never overwrites archived rows
+        """
+        rows = queryset.order_by('id').values_list(*ARCHIVE_FIELDS).iterator(chunk_size=batch_size)
+        fd, tmp_path = tempfile.mkstemp(dir=output_dir, prefix=f'{label}.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as raw, gzip.open(raw, 'wt', newline='') as archive:
+                writer = csv.writer(archive)
+                writer.writerow(ARCHIVE_FIELDS)
+                while batch := list(islice(rows, batch_size)):
+                    writer.writerows(self._serialize(row) for row in batch)
+            path = self._unused_path(output_dir, label)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        queryset.purge(batch_size=batch_size)
+        return path
+
+    @staticmethod
+    def _serialize(row):
+        """Render metadata as JSON and datetimes as ISO 8601 so the archive can be re-imported"""
+        return [
+            json.dumps(value) if field == 'metadata'
+            else value.isoformat() if isinstance(value, datetime)
+            else value
+            for field, value in zip(ARCHIVE_FIELDS, row)
+        ]
+
+    @staticmethod
+    def _unused_path(output_dir, label):
+        """Return notif_YYYY_MM.csv.gz, or the first notif_YYYY_MM_N.csv.gz not already taken"""
+        path = os.path.join(output_dir, f'{label}.csv.gz')
+        suffix = 1
+        while os.path.exists(path):
+            path = os.path.join(output_dir, f'{label}_{suffix}.csv.gz')
+            suffix += 1
+        return path
+
+    @staticmethod
+    def _month_start(value: datetime, offset: int) -> datetime:
+        """Return the first instant of the month `offset` months from `value`"""
+        month_index = value.year * 12 + value.month - 1 + offset
+        return value.replace(year=month_index // 12, month=month_index % 12 + 1, day=1,
+                             hour=0, minute=0, second=0, microsecond=0)
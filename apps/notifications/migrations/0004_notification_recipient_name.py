@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-16 18:18
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_recipient_names(apps, schema_editor):
+    Notification = apps.get_model("notifications", "Notification")
+    NotificationDigest = apps.get_model("notifications", "NotificationDigest")
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split("."))
+
+    for user in User.objects.filter(notifications__isnull=False).distinct().iterator():
+        full_name = f"{user.first_name} {user.last_name}".strip()[:255]
+        Notification.objects.filter(user=user).update(recipient_name=full_name)
+        NotificationDigest.objects.filter(user=user).update(recipient_name=full_name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0003_alter_notification_action_label"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notification",
+            name="recipient_name",
+            field=models.CharField(
+                blank=True,
+                help_text="Recipient's full name, denormalized from user",
+                max_length=255,
+            ),
+        ),
+        migrations.AddField(
+            model_name="notificationdigest",
+            name="recipient_name",
+            field=models.CharField(
+                blank=True,
+                help_text="Recipient's full name, denormalized from user",
+                max_length=255,
+            ),
+        ),
+        migrations.RunPython(backfill_recipient_names, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-16 18:21
+
+import django.contrib.postgres.indexes
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("notifications", "0004_notification_recipient_name"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                condition=models.Q(("expires_at__isnull", False)),
+                fields=["expires_at"],
+                name="notif_expires_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["metadata"], name="notif_metadata_gin"
+            ),
+        ),
+    ]
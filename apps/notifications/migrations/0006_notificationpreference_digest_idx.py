@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-16 18:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0005_notification_metadata_gin_expires_idx"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="notificationpreference",
+            index=models.Index(
+                condition=models.Q(("daily_digest", True), ("is_enabled", True)),
+                fields=["user"],
+                name="notifpref_daily_digest_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="notificationpreference",
+            index=models.Index(
+                condition=models.Q(("is_enabled", True), ("weekly_digest", True)),
+                fields=["user"],
+                name="notifpref_weekly_digest_idx",
+            ),
+        ),
+    ]
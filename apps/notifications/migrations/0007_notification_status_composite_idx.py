@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-16 18:34
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("notifications", "0006_notificationpreference_digest_idx"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                fields=["user", "status", "-created_at"],
+                name="notif_user_status_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                fields=["status", "scheduled_for"], name="notif_status_scheduled_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-16 19:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("notifications", "0009_notification_cleanup_idx"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                fields=["created_at", "status", "notification_type", "priority"],
+                name="notif_analytics_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-16 19:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("notifications", "0010_notification_analytics_idx"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="notification",
+            name="notif_status_read_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="notification",
+            name="notif_status_updated_idx",
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                condition=models.Q(("status", "read")),
+                fields=["read_at"],
+                name="notif_read_at_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                condition=models.Q(("status", "dismissed")),
+                fields=["updated_at"],
+                name="notif_dismissed_updated_idx",
+            ),
+        ),
+    ]
@@ -3,15 +3,89 @@ BLACK CORAL Real-Time Notification System
 User notifications, alerts, and communication management
 """
 
-from django.db import models
+import json
+import string
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from functools import cached_property, lru_cache
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from django.db import models, transaction
+from django.db.models import Case, ExpressionWrapper, F, Q, Value, When
+from django.db.models.functions import Now
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.postgres.indexes import GinIndex
+from django.core.exceptions import ValidationError
+from django.core.cache import cache
 from apps.core.models import BaseModel
 
 User = get_user_model()
 
+_formatter = string.Formatter()
+
+
+@lru_cache(maxsize=512)
+def _parse_template(template):
+    """Parse a str.format template once into its (literal, field, spec, conversion) parts"""
+    return tuple(_formatter.parse(template))
+
+
+def _compile_payload_node(node):
+    """Compile one node of a JSON payload template into a context -> value callable"""
+    if isinstance(node, dict):
+        items = [(key, _compile_payload_node(value)) for key, value in node.items()]
+        return lambda context: {key: render(context) for key, render in items}
+    if isinstance(node, list):
+        renders = [_compile_payload_node(value) for value in node]
+        return lambda context: [render(context) for render in renders]
+    if isinstance(node, str):
+        parts = _parse_template(node)
+        if len(parts) == 1 and not parts[0][0] and parts[0][1] and not parts[0][2] and not parts[0][3]:
+            # A bare "{field}" keeps the value's JSON type instead of becoming a string
+            field_name = parts[0][1]
+            return lambda context: _formatter.get_field(field_name, (), context)[0]
+        if any(field_name is not None for _, field_name, _, _ in parts):
+            return lambda context: _render_template(node, context)
+    return lambda context: node
+
+
+@lru_cache(maxsize=128)
+def _compile_payload_template(template):
+    """Parse a JSON payload template once into a callable rendering it from a context"""
+    return _compile_payload_node(json.loads(template))
+
+
+@lru_cache(maxsize=1)
+def _webhook_session():
+    """Shared HTTP session so webhook sends reuse pooled keep-alive connections"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=32, pool_maxsize=WebhookEndpoint.MAX_CONCURRENT_SENDS)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def _render_template(template, context):
+    """Render a str.format template from its cached parse tree"""
+    parts = []
+    for literal_text, field_name, format_spec, conversion in _parse_template(template):
+        if literal_text:
+            parts.append(literal_text)
+        if field_name is None:
+            continue
+        value, _ = _formatter.get_field(field_name, (), context)
+        value = _formatter.convert_field(value, conversion)
+        if format_spec and '{' in format_spec:
+            format_spec = _render_template(format_spec, context)
+        parts.append(_formatter.format_field(value, format_spec))
+    return ''.join(parts)
+
 
 class NotificationPreference(BaseModel):
     """
@@ -62,10 +136,170 @@ class NotificationPreference(BaseModel):
         indexes = [
             models.Index(fields=['user', 'notification_type']),
             models.Index(fields=['is_enabled']),
+            models.Index(fields=['user'], name='notifpref_daily_digest_idx',
+                         condition=Q(daily_digest=True, is_enabled=True)),
+            models.Index(fields=['user'], name='notifpref_weekly_digest_idx',
+                         condition=Q(weekly_digest=True, is_enabled=True)),
         ]
     
     def __str__(self):
         return f"{self.user.get_full_name()} - {self.get_notification_type_display()} via {self.get_delivery_method_display()}"
+    
+    CACHE_TIMEOUT = 300  # 5 minutes
+    
+    @staticmethod
+    def cache_key(user_id):
+        return f'np:{user_id}'
+    
+    VECTOR_FIELDS = (
+        'user_id', 'notification_type', 'delivery_method', 'is_enabled',
+        'immediate', 'daily_digest', 'weekly_digest',
+        'quiet_hours_start', 'quiet_hours_end',
+    )
+    
+    @classmethod
+    def _load_vectors(cls, user_ids):
+        """Enabled preferences for several users in one query, keyed by user then (type, method)"""
+        vectors = {user_id: {} for user_id in user_ids}
+        preferences = cls.objects.filter(user_id__in=user_ids, is_enabled=True).only(*cls.VECTOR_FIELDS)
+        for pref in preferences:
+            vectors[pref.user_id][(pref.notification_type, pref.delivery_method)] = pref
+        return vectors
+    
+    @classmethod
+    def vector_for(cls, user_id):
+        """Enabled preferences for a user keyed by (notification_type, delivery_method), cached"""
+        return cache.get_or_set(
+            cls.cache_key(user_id), lambda: cls._load_vectors([user_id])[user_id], cls.CACHE_TIMEOUT
+        )
+    
+    @classmethod
+    def vectors_for(cls, user_ids):
+        """Cached preference vectors for many users; misses are loaded together in one query"""
+        keys = {cls.cache_key(user_id): user_id for user_id in set(user_ids)}
+        vectors = {keys[key]: vector for key, vector in cache.get_many(keys).items()}
+        missing = [user_id for user_id in keys.values() if user_id not in vectors]
+        if missing:
+            loaded = cls._load_vectors(missing)
+            cache.set_many({cls.cache_key(user_id): vector for user_id, vector in loaded.items()}, cls.CACHE_TIMEOUT)
+            vectors.update(loaded)
+        return vectors
+    
+    @staticmethod
+    def of_type(vector, notification_type):
+        """Preferences in a vector that apply to one notification type"""
+        return [pref for (pref_type, _), pref in vector.items() if pref_type == notification_type]
+    
+    @classmethod
+    def for_type(cls, user_id, notification_type):
+        """Enabled preferences for one notification type, served from the cached vector"""
+        return cls.of_type(cls.vector_for(user_id), notification_type)
+    
+    @classmethod
+    def invalidate_cache(cls, user_id):
+        cache.delete(cls.cache_key(user_id))
+    
+    UPSERT_FIELDS = [
+        'is_enabled', 'immediate', 'daily_digest', 'weekly_digest',
+        'quiet_hours_start', 'quiet_hours_end', 'updated_at',
+    ]
+    
+    @classmethod
+    def bulk_set(cls, user, rows):
+        """
+        Create or update a user's preference matrix in a single upsert.
+        Each row is a dict with notification_type, delivery_method and any preference fields.
+        """
+        preferences = [cls(user=user, **row) for row in rows]
+        with transaction.atomic():
+            preferences = cls.objects.bulk_create(
+                preferences,
+                update_conflicts=True,
+                unique_fields=['user', 'notification_type', 'delivery_method'],
+                update_fields=cls.UPSERT_FIELDS,
+                batch_size=200,
+            )
+        # bulk_create skips post_save, so drop the cached vector explicitly
+        cls.invalidate_cache(user.pk)
+        return preferences
+
+
+class NotificationQuerySet(models.QuerySet):
+    """Query helpers for notification reads"""
+    
+    SUMMARY_FIELDS = (
+        'id', 'user_id', 'title', 'priority', 'status', 'created_at',
+        'action_url', 'action_label', 'notification_type',
+    )
+    
+    def inbox_summary(self):
+        """Load only the narrow columns needed for inbox listings"""
+        return self.only(*self.SUMMARY_FIELDS)
+    
+    def with_body(self):
+        """Summary columns plus the message body and metadata for rendered items"""
+        return self.only(*self.SUMMARY_FIELDS, 'message', 'metadata')
+    
+    DELIVERY_FIELDS = (
+        'id', 'user_id', 'notification_type', 'title', 'message', 'priority',
+        'status', 'sent_at', 'metadata', 'content_type_id', 'object_id',
+        'action_url', 'scheduled_for', 'expires_at',
+        'user__first_name', 'user__last_name', 'user__email',
+    )
+    
+    def for_delivery(self):
+        """Columns read by the delivery channels, with the recipient joined in"""
+        return self.select_related('user').only(*self.DELIVERY_FIELDS)
+    
+    def with_targets(self):
+        """Resolve content_object with one query per content type instead of one per row"""
+        return self.prefetch_related('content_object')
+    
+    def active(self):
+        """Notifications that have not expired, compared against the database clock"""
+        return self.filter(Q(expires_at__isnull=True) | Q(expires_at__gt=Now()))
+    
+    def for_user(self, user):
+        """Notifications addressed to one user"""
+        return self.filter(user=user)
+    
+    def unread(self):
+        """Sent notifications that have not expired; read and dismissed ones move out of 'sent'"""
+        return self.filter(status='sent').active()
+    
+    def recent(self, limit=50, offset=0):
+        """Newest first, sliced to one page; call last since the slice ends the chain"""
+        return self.order_by('-created_at')[offset:offset + limit]
+    
+    def purge(self, batch_size=None):
+        """
+        Delete matching rows with plain DELETE statements instead of collecting
+        them one by one for post_delete; returns the number of notifications removed.
+        With batch_size, rows are removed in short transactions of at most that many ids,
+        and each batch's recipients have their unread counts invalidated once it commits
+        """
+        if batch_size is None:
+            user_ids = list(self.order_by().values_list('user_id', flat=True).distinct())
+            with transaction.atomic(using=self.db):
+                self.model.digests.through.objects.filter(notification_id__in=self.values('id')).delete()
+                deleted = self._raw_delete(self.db)
+            self.model.invalidate_unread_count(*user_ids)
+            return deleted
+        
+        deleted = 0
+        while True:
+            rows = list(self.order_by().values_list('id', 'user_id')[:batch_size])
+            if not rows:
+                break
+            ids = [notification_id for notification_id, _ in rows]
+            batch = self.model.objects.filter(id__in=ids)
+            with transaction.atomic(using=self.db):
+                self.model.digests.through.objects.filter(notification_id__in=ids).delete()
+                deleted += batch._raw_delete(self.db)
+            self.model.invalidate_unread_count(*(user_id for _, user_id in rows))
+            if len(rows) < batch_size:
+                break
+        return deleted
 
 
 class Notification(BaseModel):
@@ -90,6 +324,7 @@ class Notification(BaseModel):
     
     # Recipient
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
+    recipient_name = models.CharField(max_length=255, blank=True, help_text="Recipient's full name, denormalized from user")
     
     # Notification details
     notification_type = models.CharField(max_length=30, choices=NotificationPreference.NOTIFICATION_TYPES)
@@ -122,6 +357,8 @@ class Notification(BaseModel):
     # Grouping (for digest notifications)
     group_key = models.CharField(max_length=100, blank=True, help_text="Key for grouping related notifications")
     
+    objects = NotificationQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-created_at']
         indexes = [
@@ -131,10 +368,23 @@ class Notification(BaseModel):
             models.Index(fields=['priority']),
             models.Index(fields=['scheduled_for']),
             models.Index(fields=['group_key']),
+            models.Index(fields=['user', 'status', '-created_at'], name='notif_user_status_created_idx'),
+            models.Index(fields=['status', 'scheduled_for'], name='notif_status_scheduled_idx'),
+            models.Index(fields=['content_type', 'object_id', 'notification_type', 'created_at'], name='notif_dedup_idx'),
+            models.Index(fields=['read_at'], name='notif_read_at_idx', condition=Q(status='read')),
+            models.Index(fields=['updated_at'], name='notif_dismissed_updated_idx', condition=Q(status='dismissed')),
+            models.Index(fields=['created_at', 'status', 'notification_type', 'priority'], name='notif_analytics_idx'),
+            models.Index(fields=['expires_at'], name='notif_expires_idx', condition=Q(expires_at__isnull=False)),
+            GinIndex(fields=['metadata'], name='notif_metadata_gin'),
         ]
     
     def __str__(self):
-        return f"{self.title} -> {self.user.get_full_name()}"
+        return f"{self.title} -> {self.recipient_name}"
+    
+    def save(self, *args, **kwargs):
+        if self._state.adding and not self.recipient_name:
+            self.recipient_name = self.user.get_full_name()[:255]
+        super().save(*args, **kwargs)
     
     @property
     def is_read(self):
@@ -148,6 +398,16 @@ class Notification(BaseModel):
             return timezone.now() > self.expires_at
         return False
     
+    UNREAD_COUNT_TIMEOUT = 300  # 5 minutes
+    
+    @staticmethod
+    def unread_count_key(user_id):
+        return f'notif:unread:{user_id}'
+    
+    @classmethod
+    def invalidate_unread_count(cls, *user_ids):
+        cache.delete_many([cls.unread_count_key(user_id) for user_id in set(user_ids)])
+    
     def mark_as_read(self):
         """Mark notification as read"""
         self.status = 'read'
@@ -190,24 +450,43 @@ class NotificationTemplate(BaseModel):
     def __str__(self):
         return f"Template: {self.get_notification_type_display()}"
     
+    CACHE_TIMEOUT = 300  # 5 minutes
+    
+    @staticmethod
+    def cache_key(notification_type):
+        return f'notif_tpl:{notification_type}'
+    
+    @classmethod
+    def for_type(cls, notification_type):
+        """Template for a notification type (or None), cached including misses"""
+        return cache.get_or_set(
+            cls.cache_key(notification_type),
+            lambda: cls.objects.filter(notification_type=notification_type).first(),
+            cls.CACHE_TIMEOUT
+        )
+    
+    @classmethod
+    def invalidate_cache(cls, notification_type):
+        cache.delete(cls.cache_key(notification_type))
+    
     def render_title(self, context):
         """Render title template with context variables"""
-        return self.title_template.format(**context)
+        return _render_template(self.title_template, context)
     
     def render_message(self, context):
         """Render message template with context variables"""
-        return self.message_template.format(**context)
+        return _render_template(self.message_template, context)
     
     def render_email_subject(self, context):
         """Render email subject template with context variables"""
         if self.email_subject_template:
-            return self.email_subject_template.format(**context)
+            return _render_template(self.email_subject_template, context)
         return self.render_title(context)
     
     def render_email_body(self, context):
         """Render email body template with context variables"""
         if self.email_body_template:
-            return self.email_body_template.format(**context)
+            return _render_template(self.email_body_template, context)
         return self.render_message(context)
 
 
@@ -222,6 +501,7 @@ class NotificationDigest(BaseModel):
     ]
     
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notification_digests')
+    recipient_name = models.CharField(max_length=255, blank=True, help_text="Recipient's full name, denormalized from user")
     digest_type = models.CharField(max_length=10, choices=DIGEST_TYPE_CHOICES)
     
     # Digest content
@@ -248,7 +528,31 @@ class NotificationDigest(BaseModel):
         ]
     
     def __str__(self):
-        return f"{self.get_digest_type_display()} for {self.user.get_full_name()} ({self.period_start.date()})"
+        return f"{self.get_digest_type_display()} for {self.recipient_name} ({self.period_start.date()})"
+    
+    def save(self, *args, **kwargs):
+        if self._state.adding and not self.recipient_name:
+            self.recipient_name = self.user.get_full_name()[:255]
+        super().save(*args, **kwargs)
+
+
+class AlertRuleQuerySet(models.QuerySet):
+    """Query helpers for alert rule evaluation"""
+    
+    def ready(self):
+        """Active rules whose frequency window has elapsed, evaluated in SQL"""
+        frequency = ExpressionWrapper(
+            F('max_frequency_hours') * timedelta(hours=1),
+            output_field=models.DurationField()
+        )
+        return self.filter(is_active=True).annotate(
+            next_trigger_at=ExpressionWrapper(
+                F('last_triggered') + frequency,
+                output_field=models.DateTimeField()
+            )
+        ).filter(
+            Q(last_triggered__isnull=True) | Q(next_trigger_at__lte=Now())
+        )
 
 
 class AlertRule(BaseModel):
@@ -287,6 +591,8 @@ class AlertRule(BaseModel):
     last_triggered = models.DateTimeField(null=True, blank=True)
     trigger_count = models.IntegerField(default=0)
     
+    objects = AlertRuleQuerySet.as_manager()
+    
     class Meta:
         ordering = ['name']
         indexes = [
@@ -313,15 +619,36 @@ class AlertRule(BaseModel):
         if not self.can_trigger():
             return False
         
-        # Update trigger tracking
-        self.last_triggered = timezone.now()
-        self.trigger_count += 1
-        self.save(update_fields=['last_triggered', 'trigger_count'])
+        # Update trigger tracking atomically so concurrent workers don't lose increments
+        now = timezone.now()
+        AlertRule.objects.filter(pk=self.pk).update(
+            last_triggered=now,
+            trigger_count=F('trigger_count') + 1
+        )
+        self.last_triggered = now
+        self.refresh_from_db(fields=['trigger_count'])
         
         # TODO: Create notifications for target users
         return True
 
 
+class WebhookEndpointQuerySet(models.QuerySet):
+    """Query helpers for webhook monitoring"""
+    
+    def with_success_rate(self):
+        """Annotate success_rate_db so endpoints can be sorted and filtered by delivery health"""
+        return self.annotate(
+            success_rate_db=Case(
+                When(Q(success_count=0) & Q(failure_count=0), then=Value(0.0)),
+                default=ExpressionWrapper(
+                    F('success_count') * 100.0 / (F('success_count') + F('failure_count')),
+                    output_field=models.FloatField()
+                ),
+                output_field=models.FloatField()
+            )
+        )
+
+
 class WebhookEndpoint(BaseModel):
     """
     Webhook endpoints for external notification integrations
@@ -356,6 +683,8 @@ class WebhookEndpoint(BaseModel):
     success_count = models.IntegerField(default=0)
     failure_count = models.IntegerField(default=0)
     
+    objects = WebhookEndpointQuerySet.as_manager()
+    
     class Meta:
         ordering = ['name']
         indexes = [
@@ -366,9 +695,85 @@ class WebhookEndpoint(BaseModel):
     def __str__(self):
         return f"{self.name} ({self.get_service_type_display()})"
     
+    def record_delivery(self, success):
+        """Atomically count a delivery attempt against this endpoint"""
+        counter = 'success_count' if success else 'failure_count'
+        WebhookEndpoint.objects.filter(pk=self.pk).update(
+            last_sent=timezone.now(),
+            **{counter: F(counter) + 1}
+        )
+    
+    MAX_CONCURRENT_SENDS = 20
+    SEND_TIMEOUT = 10  # seconds
+    
+    def clean(self):
+        super().clean()
+        if self.payload_template:
+            try:
+                _compile_payload_template(self.payload_template)
+            except ValueError as e:
+                raise ValidationError({'payload_template': f"Invalid JSON payload template: {e}"})
+    
+    @cached_property
+    def payload_renderer(self):
+        """Compiled payload_template, or None to send the default payload"""
+        if not self.payload_template:
+            return None
+        return _compile_payload_template(self.payload_template)
+    
+    def build_payload(self, notification):
+        """JSON body describing a notification for this endpoint"""
+        payload = {
+            'notification_type': notification.notification_type,
+            'title': notification.title,
+            'message': notification.message,
+            'priority': notification.priority,
+            'action_url': notification.action_url,
+        }
+        if self.payload_renderer is None:
+            return payload
+        return self.payload_renderer({**(notification.metadata or {}), **payload})
+    
+    def send(self, payload):
+        """POST a payload to this endpoint, returning whether it was accepted"""
+        try:
+            response = _webhook_session().post(
+                self.webhook_url, json=payload, headers=self.headers or None, timeout=self.SEND_TIMEOUT
+            )
+            return response.ok
+        except requests.RequestException:
+            return False
+    
+    @classmethod
+    def dispatch_batch(cls, deliveries):
+        """
+        Send (endpoint, payload) pairs concurrently over pooled connections.
+        Delivery counters are updated once per endpoint; returns one success flag per delivery.
+        """
+        deliveries = list(deliveries)
+        if not deliveries:
+            return []
+        
+        with ThreadPoolExecutor(max_workers=min(cls.MAX_CONCURRENT_SENDS, len(deliveries))) as executor:
+            results = list(executor.map(lambda delivery: delivery[0].send(delivery[1]), deliveries))
+        
+        successes, failures = Counter(), Counter()
+        for (endpoint, _), success in zip(deliveries, results):
+            (successes if success else failures)[endpoint.pk] += 1
+        for endpoint_pk in successes.keys() | failures.keys():
+            cls.objects.filter(pk=endpoint_pk).update(
+                last_sent=timezone.now(),
+                success_count=F('success_count') + successes[endpoint_pk],
+                failure_count=F('failure_count') + failures[endpoint_pk],
+            )
+        return results
+    
     @property
     def success_rate(self):
         """Calculate webhook success rate"""
+        annotated = getattr(self, 'success_rate_db', None)
+        if annotated is not None:
+            return annotated
         total = self.success_count + self.failure_count
         if total > 0:
             return (self.success_count / total) * 100
@@ -4,13 +4,17 @@ Real-time notification creation, delivery, and management
 """
 
 import logging
+from contextlib import nullcontext
+from itertools import islice
 from typing import Dict, Any, List, Optional, Union
 from datetime import datetime, timedelta
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.models import ContentType
-from django.core.mail import send_mail
+from django.core.mail import get_connection, send_mail
 from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
 from django.template import Template, Context
 
 from .models import (
@@ -21,6 +25,20 @@ from .models import (
 User = get_user_model()
 logger = logging.getLogger(__name__)
 
+NOTIFICATION_BATCH_SIZE = 500
+DELIVERY_BATCH_SIZE = 500
+IMMEDIATE_DELIVERY_LIMIT = 10000
+DIGEST_CHUNK_SIZE = 2000
+DIGEST_USER_CHUNK_SIZE = 500
+
+# Celery queue per priority for immediate delivery, so urgent notices never wait behind low-priority backlogs
+DELIVERY_QUEUES = {
+    'urgent': 'notifications.urgent',
+    'high': 'notifications.urgent',
+    'medium': 'notifications',
+    'low': 'notifications.low',
+}
+
 
 class NotificationService:
     """Central service for managing notifications"""
@@ -45,47 +63,32 @@ class NotificationService:
         """
         
         # Get template if title/message not provided
+        template = None
         if not title or not message:
             template = self._get_template(notification_type)
-            if template:
-                context = self._build_context(user, content_object, metadata or {})
-                title = title or template.render_title(context)
-                message = message or template.render_message(context)
-                if not expires_after_hours and template.expires_after_hours:
-                    expires_after_hours = template.expires_after_hours
-        
-        # Calculate expiration
-        expires_at = None
-        if expires_after_hours:
-            expires_at = timezone.now() + timedelta(hours=expires_after_hours)
         
-        # Create content type reference if content_object provided
-        content_type = None
-        object_id = None
-        if content_object:
-            content_type = ContentType.objects.get_for_model(content_object)
-            object_id = content_object.pk
-        
-        # Create notification
-        notification = Notification.objects.create(
+        notification = self._build_notification(
             user=user,
             notification_type=notification_type,
+            template=template,
             title=title,
             message=message,
             priority=priority,
-            content_type=content_type,
-            object_id=object_id,
+            content_object=content_object,
+            content_type=ContentType.objects.get_for_model(content_object) if content_object else None,
             action_url=action_url,
             action_label=action_label,
-            metadata=metadata or {},
+            metadata=metadata,
             scheduled_for=scheduled_for,
-            expires_at=expires_at
+            expires_at=self._expires_at(template, expires_after_hours)
         )
+        notification.save()
         
-        self.logger.info(f"Created notification {notification.id} for {user.get_full_name()}")
+        self.logger.info(f"Created notification {notification.id} for {notification.recipient_name}")
         
         # Schedule delivery
-        self._schedule_delivery(notification)
+        if self._schedule_delivery(notification):
+            self._enqueue_delivery([notification])
         
         return notification
     
@@ -94,23 +97,104 @@ class NotificationService:
                             notification_type: str,
                             title: str = None,
                             message: str = None,
+                            content_object: Any = None,
+                            expires_after_hours: int = None,
                             **kwargs) -> List[Notification]:
         """
         Create notifications for multiple users
         """
-        notifications = []
-        for user in users:
-            notification = self.create_notification(
+        # Resolve shared lookups once for the whole batch
+        template = None
+        if not title or not message:
+            template = self._get_template(notification_type)
+        content_type = ContentType.objects.get_for_model(content_object) if content_object else None
+        expires_at = self._expires_at(template, expires_after_hours)
+        shared_context = self._shared_context(content_object) if template else None
+        
+        notifications = self.create_notifications([
+            self._build_notification(
                 user=user,
                 notification_type=notification_type,
+                template=template,
                 title=title,
                 message=message,
+                content_object=content_object,
+                content_type=content_type,
+                expires_at=expires_at,
+                shared_context=shared_context,
                 **kwargs
             )
-            notifications.append(notification)
+            for user in users
+        ])
+        
+        self.logger.info(f"Created {len(notifications)} {notification_type} notifications")
         
         return notifications
     
+    def create_notifications(self, notifications: List[Notification]) -> List[Notification]:
+        """
+        Insert prepared (unsaved) notifications in bulk and schedule their delivery
+        """
+        if not notifications:
+            return []
+        
+        # Decide immediate vs. deferred delivery before insert so no per-row UPDATE is needed
+        vectors = NotificationPreference.vectors_for(n.user_id for n in notifications)
+        deliver_later_at = timezone.now() + timedelta(minutes=5)
+        immediate = []
+        for notification in notifications:
+            if notification.scheduled_for:
+                continue
+            preferences = NotificationPreference.of_type(vectors[notification.user_id], notification.notification_type)
+            if any(preference.immediate for preference in preferences):
+                immediate.append(notification)
+            else:
+                notification.scheduled_for = deliver_later_at
+        
+        notifications = Notification.objects.bulk_create(notifications, batch_size=NOTIFICATION_BATCH_SIZE)
+        self._enqueue_delivery(immediate)
+        
+        return notifications
+    
+    def queue_notifications(self, users, notification_type: str, title: str, message: str, **kwargs):
+        """
+        Create notifications for users (instances or ids) in a worker once the current transaction commits
+        """
+        user_ids = [getattr(user, 'pk', user) for user in users]
+        if user_ids:
+            self._enqueue_creation([(user_ids, self._queued_fields(notification_type, title, message, **kwargs))])
+    
+    def queue_notification(self, user: User, notification_type: str, title: str, message: str, **kwargs):
+        """
+        Create a notification for one user in a worker once the current transaction commits
+        """
+        self.queue_notifications([user], notification_type, title, message, **kwargs)
+    
+    def queue_recipient_notifications(self, recipients: Dict[Any, Dict[str, Any]]):
+        """
+        Queue a differently worded notification per recipient as a single message.
+        `recipients` maps a user (instance or id) to queue_notification keyword arguments.
+        """
+        if recipients:
+            self._enqueue_creation([
+                ([getattr(user, 'pk', user)], self._queued_fields(**kwargs))
+                for user, kwargs in recipients.items()
+            ])
+    
+    def create_queued_notifications(self, groups: List[List[Any]]) -> List[Notification]:
+        """
+        Bulk-insert the notifications described by a queued message of (user_ids, fields) groups
+        """
+        users = User.objects.only('id', 'first_name', 'last_name').in_bulk(
+            {user_id for user_ids, fields in groups for user_id in user_ids}
+        )
+        return self.create_notifications([
+            Notification(user=users[user_id], recipient_name=users[user_id].get_full_name()[:255], **fields)
+            for user_ids, fields in groups
+            for user_id in user_ids
+            if user_id in users
+        ])
+    
     def notify_team_members(self,
                           team,
                           notification_type: str,
@@ -126,13 +210,64 @@ class NotificationService:
         if roles:
             memberships = memberships.filter(role__in=roles)
         
-        users = [m.user for m in memberships]
-        
         if exclude_user:
-            users = [u for u in users if u != exclude_user]
+            memberships = memberships.exclude(user=exclude_user)
+        
+        users = [m.user for m in memberships.select_related('user')]
         
         return self.notify_multiple_users(users, notification_type, **kwargs)
     
+    def notify_new_memberships(self, memberships) -> List[Notification]:
+        """
+        Notify new members and their team leads about memberships added with
+        TeamMembership.objects.bulk_create(), which skips the post_save handler
+        that normally sends these. Call it after the bulk insert.
+        """
+        from apps.collaboration.models import ProposalTeam
+        
+        memberships = [membership for membership in memberships if membership.is_active]
+        if not memberships:
+            return []
+        
+        teams = ProposalTeam.objects.select_related('opportunity').only(
+            'id', 'name', 'lead_id', 'opportunity__solicitation_number'
+        ).in_bulk({membership.team_id for membership in memberships})
+        users = User.objects.only('id', 'first_name', 'last_name', 'email').in_bulk(
+            {membership.user_id for membership in memberships}
+            | {team.lead_id for team in teams.values() if team.lead_id}
+        )
+        team_type = ContentType.objects.get_for_model(ProposalTeam)
+        
+        notifications = []
+        for membership in memberships:
+            team = teams[membership.team_id]
+            member = users[membership.user_id]
+            notifications.append(self._build_notification(
+                user=member,
+                notification_type='team_assignment',
+                title=f"Added to {team.name}",
+                message=f"You've been assigned as {membership.get_role_display()} on the {team.opportunity.solicitation_number} proposal team.",
+                content_object=team,
+                content_type=team_type,
+                action_url=f"/teams/{team.id}/",
+                action_label="View Team",
+                priority='high'
+            ))
+            if team.lead_id and team.lead_id != membership.user_id:
+                notifications.append(self._build_notification(
+                    user=users[team.lead_id],
+                    notification_type='team_assignment',
+                    title=f"New team member: {member.get_full_name()}",
+                    message=f"{member.get_full_name()} has joined as {membership.get_role_display()}",
+                    content_object=team,
+                    content_type=team_type,
+                    action_url=f"/teams/{team.id}/members/",
+                    action_label="View Members",
+                    priority='medium'
+                ))
+        
+        return self.create_notifications(notifications)
+    
     def send_immediate_notifications(self):
         """
         Send all pending immediate notifications
@@ -140,68 +275,76 @@ class NotificationService:
         pending_notifications = Notification.objects.filter(
             status='pending',
             scheduled_for__lte=timezone.now()
-        ).exclude(
-            expires_at__lt=timezone.now()
-        )
+        ).active().for_delivery().with_targets().order_by('created_at')[:IMMEDIATE_DELIVERY_LIMIT]
         
-        for notification in pending_notifications:
-            self._deliver_notification(notification)
+        # Deliver in bounded chunks and write each chunk's statuses back in one UPDATE batch
+        pending_notifications = pending_notifications.iterator(chunk_size=DELIVERY_BATCH_SIZE)
+        while batch := list(islice(pending_notifications, DELIVERY_BATCH_SIZE)):
+            self._deliver_many(batch)
     
     def create_digest_notifications(self, digest_type: str = 'daily'):
         """
         Create digest notifications for users who have them enabled
         """
         # Get users who want digest notifications
-        users_wanting_digest = User.objects.filter(
-            notification_preferences__daily_digest=True if digest_type == 'daily' else False,
-            notification_preferences__weekly_digest=True if digest_type == 'weekly' else False
-        ).distinct()
+        digest_field = 'daily_digest' if digest_type == 'daily' else 'weekly_digest'
+        subscribers = NotificationPreference.objects.filter(is_enabled=True, **{digest_field: True})
+        users_wanting_digest = User.objects.filter(pk__in=subscribers.values('user_id'))
         
-        for user in users_wanting_digest:
+        for user in users_wanting_digest.iterator(chunk_size=DIGEST_USER_CHUNK_SIZE):
             self._create_user_digest(user, digest_type)
     
     def trigger_alert_rules(self):
         """
         Check and trigger alert rules
         """
-        active_rules = AlertRule.objects.filter(is_active=True)
-        
-        for rule in active_rules:
-            if rule.can_trigger():
-                self._evaluate_alert_rule(rule)
+        for rule in AlertRule.objects.ready():
+            self._evaluate_alert_rule(rule)
     
     def mark_notification_read(self, notification_id: int, user: User) -> bool:
         """
         Mark a notification as read
         """
-        try:
-            notification = Notification.objects.get(id=notification_id, user=user)
-            notification.mark_as_read()
+        notifications = Notification.objects.for_user(user).filter(id=notification_id)
+        if notifications.exclude(status='read').update(status='read', read_at=timezone.now()):
+            Notification.invalidate_unread_count(user.pk)
             return True
-        except Notification.DoesNotExist:
-            return False
+        # Already read still counts as success; only a missing notification is a failure
+        return notifications.exists()
+    
+    def dismiss_notification(self, notification_id: int, user: User) -> bool:
+        """
+        Dismiss a notification with a single UPDATE; False if it does not belong to the user
+        """
+        if Notification.objects.for_user(user).filter(id=notification_id).update(status='dismissed', updated_at=timezone.now()):
+            Notification.invalidate_unread_count(user.pk)
+            return True
+        return False
     
     def mark_all_read(self, user: User, notification_type: str = None) -> int:
         """
         Mark all notifications as read for a user
         """
-        queryset = Notification.objects.filter(user=user, status='sent')
+        queryset = Notification.objects.for_user(user).filter(status='sent')
         
         if notification_type:
             queryset = queryset.filter(notification_type=notification_type)
         
         count = queryset.update(status='read', read_at=timezone.now())
+        if count:
+            Notification.invalidate_unread_count(user.pk)
         return count
     
     def get_user_notifications(self, 
                              user: User,
                              unread_only: bool = False,
                              notification_type: str = None,
-                             limit: int = 50) -> List[Notification]:
+                             limit: int = 50,
+                             offset: int = 0) -> List[Notification]:
         """
         Get notifications for a user
         """
-        queryset = Notification.objects.filter(user=user)
+        queryset = Notification.objects.for_user(user)
         
         if unread_only:
             queryset = queryset.exclude(status='read')
@@ -210,39 +353,94 @@ class NotificationService:
             queryset = queryset.filter(notification_type=notification_type)
         
         # Exclude expired notifications
-        queryset = queryset.exclude(
-            expires_at__lt=timezone.now()
-        )
+        queryset = queryset.active()
         
-        return list(queryset.order_by('-created_at')[:limit])
+        return list(queryset.with_body().recent(limit, offset))
     
     def get_unread_count(self, user: User) -> int:
         """
         Get count of unread notifications for a user
         """
-        return Notification.objects.filter(
+        return cache.get_or_set(
+            Notification.unread_count_key(user.pk),
+            lambda: Notification.objects.for_user(user).unread().count(),
+            Notification.UNREAD_COUNT_TIMEOUT
+        )
+    
+    def _build_notification(self,
+                            user: User,
+                            notification_type: str,
+                            template: Optional[NotificationTemplate] = None,
+                            title: str = None,
+                            message: str = None,
+                            priority: str = 'medium',
+                            content_object: Any = None,
+                            content_type: Optional[ContentType] = None,
+                            action_url: str = None,
+                            action_label: str = None,
+                            metadata: Dict[str, Any] = None,
+                            scheduled_for: datetime = None,
+                            expires_at: datetime = None,
+                            shared_context: Dict[str, Any] = None) -> Notification:
+        """Build an unsaved notification, rendering title/message from the template if needed"""
+        if template and (not title or not message):
+            context = self._build_context(user, content_object, metadata or {}, shared_context)
+            title = title or template.render_title(context)
+            message = message or template.render_message(context)
+        
+        return Notification(
             user=user,
-            status='sent'
-        ).exclude(
-            expires_at__lt=timezone.now()
-        ).count()
+            recipient_name=user.get_full_name()[:255],
+            notification_type=notification_type,
+            title=title,
+            message=message,
+            priority=priority,
+            content_type=content_type,
+            object_id=content_object.pk if content_object else None,
+            action_url=action_url,
+            action_label=action_label,
+            metadata=metadata or {},
+            scheduled_for=scheduled_for,
+            expires_at=expires_at
+        )
+    
+    def _expires_at(self, template: Optional[NotificationTemplate], expires_after_hours: int = None) -> Optional[datetime]:
+        """Calculate expiration from an explicit window or the template default"""
+        if not expires_after_hours and template and template.expires_after_hours:
+            expires_after_hours = template.expires_after_hours
+        if expires_after_hours:
+            return timezone.now() + timedelta(hours=expires_after_hours)
+        return None
     
     def _get_template(self, notification_type: str) -> Optional[NotificationTemplate]:
         """Get notification template for type"""
-        try:
-            return NotificationTemplate.objects.get(notification_type=notification_type)
-        except NotificationTemplate.DoesNotExist:
-            return None
+        return NotificationTemplate.for_type(notification_type)
     
-    def _build_context(self, user: User, content_object: Any, metadata: Dict[str, Any]) -> Dict[str, Any]:
+    def _build_context(self,
+                       user: User,
+                       content_object: Any,
+                       metadata: Dict[str, Any],
+                       shared_context: Dict[str, Any] = None) -> Dict[str, Any]:
         """Build template context"""
         context = {
             'user_name': user.get_full_name(),
             'user_first_name': user.first_name,
             'user_email': user.email,
+        }
+        context.update(shared_context if shared_context is not None else self._shared_context(content_object))
+        
+        # Add metadata
+        context.update(metadata)
+        
+        return context
+    
+    def _shared_context(self, content_object: Any) -> Dict[str, Any]:
+        """Context values that are the same for every recipient, built once per batch"""
+        now = timezone.now()
+        context = {
             'site_url': getattr(settings, 'SITE_URL', 'https://blackcoral.ai'),
-            'current_date': timezone.now().date(),
-            'current_time': timezone.now().time(),
+            'current_date': now.date(),
+            'current_time': now.time(),
         }
         
         # Add content object context
@@ -253,39 +451,129 @@ class NotificationService:
             if hasattr(content_object, 'name'):
                 context['object_name'] = content_object.name
         
-        # Add metadata
-        context.update(metadata)
-        
         return context
     
-    def _schedule_delivery(self, notification: Notification):
-        """Schedule notification delivery"""
+    def _schedule_delivery(self, notification: Notification, preferences: List[NotificationPreference] = None) -> bool:
+        """Schedule notification delivery; returns True when it should be delivered now"""
         # Check user preferences
-        preferences = NotificationPreference.objects.filter(
-            user=notification.user,
-            notification_type=notification.notification_type,
-            is_enabled=True
-        )
+        if preferences is None:
+            preferences = NotificationPreference.for_type(notification.user_id, notification.notification_type)
         
         # If immediate delivery preferred and no scheduling
         if not notification.scheduled_for:
-            immediate_prefs = preferences.filter(immediate=True)
-            if immediate_prefs.exists():
-                self._deliver_notification(notification)
-            else:
-                # Schedule for later based on digest preferences
-                notification.scheduled_for = timezone.now() + timedelta(minutes=5)
-                notification.save()
+            if any(preference.immediate for preference in preferences):
+                return True
+            # Schedule for later based on digest preferences
+            now = timezone.now()
+            notification.scheduled_for = now + timedelta(minutes=5)
+            Notification.objects.filter(pk=notification.pk).update(
+                scheduled_for=notification.scheduled_for,
+                updated_at=now
+            )
+        return False
+    
+    def _queued_fields(self,
+                       notification_type: str,
+                       title: str,
+                       message: str,
+                       priority: str = 'medium',
+                       content_object: Any = None,
+                       action_url: str = None,
+                       action_label: str = None,
+                       metadata: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Notification column values for a queued creation message"""
+        return {
+            'notification_type': notification_type,
+            'title': title,
+            'message': message,
+            'priority': priority,
+            'content_type_id': ContentType.objects.get_for_model(content_object).pk if content_object else None,
+            'object_id': content_object.pk if content_object else None,
+            'action_url': action_url,
+            'action_label': action_label,
+            'metadata': metadata or {},
+        }
     
-    def _deliver_notification(self, notification: Notification):
+    def _enqueue_creation(self, groups: List[tuple]):
+        """Hand queued notifications to Celery once the current transaction commits"""
+        from .tasks import create_queued_notifications
+        
+        transaction.on_commit(lambda: create_queued_notifications.delay(groups))
+    
+    def _enqueue_delivery(self, notifications: List[Notification]):
+        """Hand immediate deliveries to Celery once the creating transaction commits, one queue per priority"""
+        from .tasks import deliver_notification, batch_notification_delivery
+        
+        by_queue = {}
+        for notification in notifications:
+            by_queue.setdefault(DELIVERY_QUEUES[notification.priority], []).append(notification.id)
+        
+        signatures = [
+            deliver_notification.signature((ids[0],), queue=queue) if len(ids) == 1
+            else batch_notification_delivery.signature((ids,), queue=queue)
+            for queue, ids in by_queue.items()
+        ]
+        if signatures:
+            transaction.on_commit(lambda: self._publish(signatures))
+    
+    @staticmethod
+    def _publish(signatures):
+        """Send task signatures through one pooled producer rather than acquiring one per message"""
+        with signatures[0].app.producer_or_acquire() as producer:
+            for signature in signatures:
+                signature.apply_async(producer=producer)
+    
+    def _deliver_notification(self, notification: Notification, preferences: List[NotificationPreference] = None):
         """Deliver notification via configured methods"""
+        self._dispatch_notification(notification, preferences)
+        Notification.objects.filter(pk=notification.pk).update(
+            status=notification.status,
+            sent_at=notification.sent_at,
+            updated_at=timezone.now()
+        )
+        Notification.invalidate_unread_count(notification.user_id)
+    
+    def _deliver_many(self, notifications: List[Notification]):
+        """
+        Deliver a batch of notifications sharing one preference lookup and one SMTP connection,
+        then write their statuses back together
+        """
+        vectors = NotificationPreference.vectors_for(n.user_id for n in notifications)
+        preferences = {
+            n.pk: NotificationPreference.of_type(vectors[n.user_id], n.notification_type)
+            for n in notifications
+        }
+        methods = {p.delivery_method for prefs in preferences.values() for p in prefs}
+        
+        # Load the active webhook endpoints once for the batch rather than once per notification
+        webhook_endpoints = {service_type: [] for service_type in methods & {'slack', 'teams'}}
+        if webhook_endpoints:
+            for endpoint in WebhookEndpoint.objects.filter(service_type__in=webhook_endpoints, is_active=True):
+                webhook_endpoints[endpoint.service_type].append(endpoint)
+        
+        with get_connection() if 'email' in methods else nullcontext() as connection:
+            for notification in notifications:
+                self._dispatch_notification(notification, preferences[notification.pk], connection, webhook_endpoints)
+        
+        now = timezone.now()
+        for notification in notifications:
+            notification.updated_at = now
+        with transaction.atomic():
+            Notification.objects.bulk_update(
+                notifications, ['status', 'sent_at', 'updated_at'], batch_size=DELIVERY_BATCH_SIZE
+            )
+        Notification.invalidate_unread_count(*(n.user_id for n in notifications))
+    
+    def _dispatch_notification(self,
+                               notification: Notification,
+                               preferences: List[NotificationPreference] = None,
+                               connection=None,
+                               webhook_endpoints: Dict[str, List[WebhookEndpoint]] = None):
+        """Send through each preferred channel and set status/sent_at without saving"""
         try:
             # Get user preferences for this notification type
-            preferences = NotificationPreference.objects.filter(
-                user=notification.user,
-                notification_type=notification.notification_type,
-                is_enabled=True
-            )
+            if preferences is None:
+                preferences = NotificationPreference.for_type(notification.user_id, notification.notification_type)
             
             delivery_successful = False
             
@@ -294,11 +582,10 @@ class NotificationService:
                     # In-app notifications are created by default
                     delivery_successful = True
                 elif preference.delivery_method == 'email':
-                    delivery_successful = self._send_email_notification(notification)
-                elif preference.delivery_method == 'slack':
-                    delivery_successful = self._send_webhook_notification(notification, 'slack')
-                elif preference.delivery_method == 'teams':
-                    delivery_successful = self._send_webhook_notification(notification, 'teams')
+                    delivery_successful = self._send_email_notification(notification, connection)
+                elif preference.delivery_method in ('slack', 'teams'):
+                    endpoints = webhook_endpoints.get(preference.delivery_method) if webhook_endpoints else None
+                    delivery_successful = self._send_webhook_notification(notification, preference.delivery_method, endpoints)
             
             # Update notification status
             if delivery_successful:
@@ -307,14 +594,11 @@ class NotificationService:
             else:
                 notification.status = 'failed'
             
-            notification.save()
-            
         except Exception as e:
             self.logger.error(f"Failed to deliver notification {notification.id}: {e}")
             notification.status = 'failed'
-            notification.save()
     
-    def _send_email_notification(self, notification: Notification) -> bool:
+    def _send_email_notification(self, notification: Notification, connection=None) -> bool:
         """Send notification via email"""
         try:
             template = self._get_template(notification.notification_type)
@@ -333,7 +617,8 @@ class NotificationService:
                 message=message,
                 from_email=getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@blackcoral.ai'),
                 recipient_list=[notification.user.email],
-                fail_silently=False
+                fail_silently=False,
+                connection=connection
             )
             
             return True
@@ -342,20 +627,26 @@ class NotificationService:
             self.logger.error(f"Failed to send email notification: {e}")
             return False
     
-    def _send_webhook_notification(self, notification: Notification, service_type: str) -> bool:
-        """Send notification via webhook"""
+    def _send_webhook_notification(self,
+                                   notification: Notification,
+                                   service_type: str,
+                                   endpoints: List[WebhookEndpoint] = None) -> bool:
+        """Send notification via webhook, optionally to preloaded active endpoints of service_type"""
         try:
-            endpoints = WebhookEndpoint.objects.filter(
-                service_type=service_type,
-                is_active=True,
-                notification_types__contains=[notification.notification_type]
-            )
+            if endpoints is None:
+                endpoints = WebhookEndpoint.objects.filter(
+                    service_type=service_type,
+                    is_active=True,
+                    notification_types__contains=[notification.notification_type]
+                )
+            else:
+                endpoints = [e for e in endpoints if notification.notification_type in e.notification_types]
             
-            for endpoint in endpoints:
-                # TODO: Implement webhook delivery
-                pass
+            results = WebhookEndpoint.dispatch_batch(
+                (endpoint, endpoint.build_payload(notification)) for endpoint in endpoints
+            )
             
-            return True
+            return all(results)
             
         except Exception as e:
             self.logger.error(f"Failed to send webhook notification: {e}")
@@ -364,14 +655,14 @@ class NotificationService:
     def _create_user_digest(self, user: User, digest_type: str):
         """Create digest notification for user"""
         # Determine digest period
-        now = timezone.now()
+        midnight = timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
         if digest_type == 'daily':
-            period_start = now.replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=1)
-            period_end = now.replace(hour=0, minute=0, second=0, microsecond=0)
+            period_start = midnight - timedelta(days=1)
+            period_end = midnight
         elif digest_type == 'weekly':
-            days_since_monday = now.weekday()
-            period_start = now.replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days_since_monday + 7)
-            period_end = now.replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days_since_monday)
+            days_since_monday = midnight.weekday()
+            period_start = midnight - timedelta(days=days_since_monday + 7)
+            period_end = midnight - timedelta(days=days_since_monday)
         else:
             return
         
@@ -385,7 +676,8 @@ class NotificationService:
             notification_type__in=['system_update']  # Exclude certain types from digest
         )
         
-        if notifications.count() == 0:
+        notification_count = notifications.count()
+        if notification_count == 0:
             return
         
         # Create digest
@@ -393,13 +685,20 @@ class NotificationService:
             user=user,
             digest_type=digest_type,
             title=f"{digest_type.title()} Digest - {period_start.date()}",
-            summary=f"You have {notifications.count()} updates from your BLACK CORAL activities.",
+            summary=f"You have {notification_count} updates from your BLACK CORAL activities.",
             period_start=period_start,
             period_end=period_end,
-            notification_count=notifications.count()
+            notification_count=notification_count
         )
         
-        digest.notifications.set(notifications)
+        # Stream notification ids into the digest instead of materializing every row
+        DigestNotification = NotificationDigest.notifications.through
+        notification_ids = notifications.values_list('id', flat=True).iterator(chunk_size=DIGEST_CHUNK_SIZE)
+        while batch := list(islice(notification_ids, DIGEST_CHUNK_SIZE)):
+            DigestNotification.objects.bulk_create([
+                DigestNotification(notificationdigest_id=digest.id, notification_id=notification_id)
+                for notification_id in batch
+            ])
         
         # Send digest notification
         self.create_notification(
@@ -435,4 +734,9 @@ def notify_team_members(**kwargs):
 
 def notify_multiple_users(**kwargs):
     """Convenience function to notify multiple users"""
-    return notification_service.notify_multiple_users(**kwargs)
\ No newline at end of file
+    return notification_service.notify_multiple_users(**kwargs)
+
+
+def notify_new_memberships(memberships):
+    """Convenience function to notify about bulk-created team memberships"""
+    return notification_service.notify_new_memberships(memberships)
\ No newline at end of file
@@ -4,9 +4,14 @@ Automatic notification triggers for collaboration events
 """
 
 import logging
-from django.db.models.signals import post_save, pre_save, m2m_changed
+from functools import lru_cache
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Q, Value
+from django.db.models.functions import Concat, Trim
+from django.db.models.signals import post_save, post_delete, pre_save, m2m_changed
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
 from django.utils import timezone
 from datetime import timedelta
 
@@ -15,11 +20,85 @@ from apps.collaboration.models import (
     TeamComment, ProposalMilestone, TimeLog
 )
 from apps.opportunities.models import Opportunity
+from .models import Notification, NotificationDigest, NotificationPreference, NotificationTemplate
 from .services import notification_service
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
 
+# Columns the periodic task scans need to build a notification
+TASK_NOTIFICATION_FIELDS = (
+    'id', 'title', 'due_date',
+    'assigned_to__first_name', 'assigned_to__last_name', 'assigned_to__email'
+)
+
+
+@lru_cache(maxsize=256)
+def _long_date(day):
+    """Format a date as 'October 16, 2026'; scans format the same few due dates for many rows"""
+    return day.strftime('%B %d, %Y')
+
+
+def _user_full_names(user_ids):
+    """Map user ids to full names, reading just the concatenated name column"""
+    return dict(
+        User.objects.filter(pk__in=[user_id for user_id in user_ids if user_id]).annotate(
+            full_name=Trim(Concat('first_name', Value(' '), 'last_name'))
+        ).values_list('id', 'full_name')
+    )
+
+
+def _user_full_name(instance, field):
+    """Full name of a user foreign key, without loading the user row when it isn't cached"""
+    descriptor = getattr(type(instance), field)
+    if descriptor.is_cached(instance):
+        user = getattr(instance, field)
+        return user.get_full_name() if user else None
+    user_id = getattr(instance, descriptor.field.attname)
+    return _user_full_names([user_id]).get(user_id)
+
+
+# User Signals
+
+@receiver(post_save, sender=User)
+def sync_recipient_name(sender, instance, created, update_fields=None, **kwargs):
+    """Keep denormalized recipient names in step with user renames"""
+    if created:
+        return
+    if update_fields is not None and not {'first_name', 'last_name'} & set(update_fields):
+        return
+    
+    full_name = instance.get_full_name()[:255]
+    Notification.objects.filter(user=instance).exclude(recipient_name=full_name).update(recipient_name=full_name)
+    NotificationDigest.objects.filter(user=instance).exclude(recipient_name=full_name).update(recipient_name=full_name)
+
+
+# Preference Signals
+
+@receiver(post_save, sender=NotificationPreference)
+@receiver(post_delete, sender=NotificationPreference)
+def invalidate_preference_cache(sender, instance, **kwargs):
+    """Drop the cached preference vector when a user's preferences change"""
+    NotificationPreference.invalidate_cache(instance.user_id)
+
+
+# Notification Signals
+
+@receiver(post_save, sender=Notification)
+@receiver(post_delete, sender=Notification)
+def invalidate_unread_count(sender, instance, **kwargs):
+    """Drop the cached unread count when one of the user's notifications changes"""
+    Notification.invalidate_unread_count(instance.user_id)
+
+
+# Template Signals
+
+@receiver(post_save, sender=NotificationTemplate)
+@receiver(post_delete, sender=NotificationTemplate)
+def invalidate_template_cache(sender, instance, **kwargs):
+    """Drop the cached template when it is edited or removed"""
+    NotificationTemplate.invalidate_cache(instance.notification_type)
+
 
 # Team Formation and Management Signals
 
@@ -28,9 +107,9 @@ def team_created_notification(sender, instance, created, **kwargs):
     """Notify when a new proposal team is created"""
     if created:
         # Notify team lead
-        if instance.lead:
-            notification_service.create_notification(
-                user=instance.lead,
+        if instance.lead_id:
+            notification_service.queue_notification(
+                user=instance.lead_id,
                 notification_type='team_assignment',
                 title=f"You've been assigned as lead for {instance.name}",
                 message=f"You are now the team lead for the {instance.opportunity.solicitation_number} proposal team.",
@@ -43,29 +122,30 @@ def team_created_notification(sender, instance, created, **kwargs):
 
 @receiver(post_save, sender=TeamMembership)
 def team_membership_notification(sender, instance, created, **kwargs):
-    """Notify when users are added to teams"""
+    """Notify when users are added to teams (bulk_create callers use notify_new_memberships)"""
     if created and instance.is_active:
         # Notify new team member
-        notification_service.create_notification(
-            user=instance.user,
+        notification_service.queue_notification(
+            user=instance.user_id,
             notification_type='team_assignment',
             title=f"Added to {instance.team.name}",
             message=f"You've been assigned as {instance.get_role_display()} on the {instance.team.opportunity.solicitation_number} proposal team.",
             content_object=instance.team,
-            action_url=f"/teams/{instance.team.id}/",
+            action_url=f"/teams/{instance.team_id}/",
             action_label="View Team",
             priority='high'
         )
         
         # Notify team lead about new member
-        if instance.team.lead and instance.team.lead != instance.user:
-            notification_service.create_notification(
-                user=instance.team.lead,
+        if instance.team.lead_id and instance.team.lead_id != instance.user_id:
+            member_name = _user_full_name(instance, 'user')
+            notification_service.queue_notification(
+                user=instance.team.lead_id,
                 notification_type='team_assignment',
-                title=f"New team member: {instance.user.get_full_name()}",
-                message=f"{instance.user.get_full_name()} has joined as {instance.get_role_display()}",
+                title=f"New team member: {member_name}",
+                message=f"{member_name} has joined as {instance.get_role_display()}",
                 content_object=instance.team,
-                action_url=f"/teams/{instance.team.id}/members/",
+                action_url=f"/teams/{instance.team_id}/members/",
                 action_label="View Members",
                 priority='medium'
             )
@@ -76,10 +156,10 @@ def team_membership_notification(sender, instance, created, **kwargs):
 @receiver(post_save, sender=TaskItem)
 def task_assignment_notification(sender, instance, created, **kwargs):
     """Notify when tasks are created or assigned"""
-    if created and instance.assigned_to:
+    if created and instance.assigned_to_id:
         # Notify assigned user
-        notification_service.create_notification(
-            user=instance.assigned_to,
+        notification_service.queue_notification(
+            user=instance.assigned_to_id,
             notification_type='task_assigned',
             title=f"New task assigned: {instance.title}",
             message=f"You've been assigned a new {instance.get_task_type_display().lower()} task for {instance.team.name}.",
@@ -90,12 +170,13 @@ def task_assignment_notification(sender, instance, created, **kwargs):
         )
         
         # Notify task creator if different from assignee
-        if instance.created_by and instance.created_by != instance.assigned_to:
-            notification_service.create_notification(
-                user=instance.created_by,
+        if instance.created_by_id and instance.created_by_id != instance.assigned_to_id:
+            assignee_name = _user_full_name(instance, 'assigned_to')
+            notification_service.queue_notification(
+                user=instance.created_by_id,
                 notification_type='task_assigned',
-                title=f"Task assigned to {instance.assigned_to.get_full_name()}",
-                message=f"Your task '{instance.title}' has been assigned to {instance.assigned_to.get_full_name()}.",
+                title=f"Task assigned to {assignee_name}",
+                message=f"Your task '{instance.title}' has been assigned to {assignee_name}.",
                 content_object=instance,
                 action_url=f"/tasks/{instance.id}/",
                 action_label="View Task",
@@ -104,64 +185,73 @@ def task_assignment_notification(sender, instance, created, **kwargs):
 
 
 @receiver(pre_save, sender=TaskItem)
-def task_status_change_notification(sender, instance, **kwargs):
+def task_status_change_notification(sender, instance, update_fields=None, **kwargs):
     """Notify when task status changes"""
-    if instance.pk:  # Only for existing tasks
-        try:
-            old_task = TaskItem.objects.get(pk=instance.pk)
-            
-            # Task completed
-            if old_task.status != 'completed' and instance.status == 'completed':
-                # Notify team lead
-                if instance.team.lead and instance.team.lead != instance.assigned_to:
-                    notification_service.create_notification(
-                        user=instance.team.lead,
-                        notification_type='task_assigned',
-                        title=f"Task completed: {instance.title}",
-                        message=f"{instance.assigned_to.get_full_name()} completed the task '{instance.title}'.",
-                        content_object=instance,
-                        action_url=f"/tasks/{instance.id}/",
-                        action_label="View Task",
-                        priority='low'
-                    )
-                
-                # Update section progress if task belongs to a section
-                if instance.section:
-                    section_tasks = instance.section.tasks.all()
-                    completed_tasks = section_tasks.filter(status='completed').count()
-                    total_tasks = section_tasks.count()
-                    
-                    if total_tasks > 0:
-                        progress = (completed_tasks / total_tasks) * 100
-                        
-                        # Notify section owner if significant progress made
-                        if progress >= 100 and instance.section.assigned_to:
-                            notification_service.create_notification(
-                                user=instance.section.assigned_to,
-                                notification_type='milestone_approaching',
-                                title=f"Section tasks completed: {instance.section.title}",
-                                message=f"All tasks for section '{instance.section.title}' have been completed.",
-                                content_object=instance.section,
-                                action_url=f"/sections/{instance.section.id}/",
-                                action_label="View Section",
-                                priority='medium'
-                            )
+    if not instance.pk:  # Only for existing tasks
+        return
+    if update_fields is not None and not {'status', 'assigned_to', 'assigned_to_id'} & set(update_fields):
+        return
+    
+    # Diff against the values loaded with the instance; only query when they are unknown
+    previous = getattr(instance, 'loaded_values', {})
+    if len(previous) < len(TaskItem.TRACKED_FIELDS):
+        previous = TaskItem.objects.filter(pk=instance.pk).values(*TaskItem.TRACKED_FIELDS).first()
+        if previous is None:
+            return
+    
+    # Task completed
+    if previous['status'] != 'completed' and instance.status == 'completed':
+        # Notify team lead
+        if instance.team.lead_id and instance.team.lead_id != instance.assigned_to_id:
+            notification_service.queue_notification(
+                user=instance.team.lead_id,
+                notification_type='task_assigned',
+                title=f"Task completed: {instance.title}",
+                message=f"{_user_full_name(instance, 'assigned_to') or 'Someone'} completed the task '{instance.title}'.",
+                content_object=instance,
+                action_url=f"/tasks/{instance.id}/",
+                action_label="View Task",
+                priority='low'
+            )
+        
+        # Update section progress if task belongs to a section
+        if instance.section:
+            # This save has not hit the table yet, so count this task as completed too
+            counts = instance.section.tasks.aggregate(
+                completed=Count('id', filter=Q(status='completed') | Q(pk=instance.pk)),
+                total=Count('id')
+            )
+            completed_tasks, total_tasks = counts['completed'], counts['total']
             
-            # Assignment change
-            if old_task.assigned_to != instance.assigned_to and instance.assigned_to:
-                notification_service.create_notification(
-                    user=instance.assigned_to,
-                    notification_type='task_assigned',
-                    title=f"Task reassigned: {instance.title}",
-                    message=f"You've been assigned the task '{instance.title}' previously assigned to {old_task.assigned_to.get_full_name() if old_task.assigned_to else 'no one'}.",
-                    content_object=instance,
-                    action_url=f"/tasks/{instance.id}/",
-                    action_label="View Task",
-                    priority='high'
-                )
+            if total_tasks > 0:
+                progress = (completed_tasks / total_tasks) * 100
                 
-        except TaskItem.DoesNotExist:
-            pass
+                # Notify section owner if significant progress made
+                if progress >= 100 and instance.section.assigned_to_id:
+                    notification_service.queue_notification(
+                        user=instance.section.assigned_to_id,
+                        notification_type='milestone_approaching',
+                        title=f"Section tasks completed: {instance.section.title}",
+                        message=f"All tasks for section '{instance.section.title}' have been completed.",
+                        content_object=instance.section,
+                        action_url=f"/sections/{instance.section.id}/",
+                        action_label="View Section",
+                        priority='medium'
+                    )
+    
+    # Assignment change
+    if instance.assigned_to_id and previous['assigned_to_id'] != instance.assigned_to_id:
+        previous_assignee_name = _user_full_names([previous['assigned_to_id']]).get(previous['assigned_to_id'])
+        notification_service.queue_notification(
+            user=instance.assigned_to_id,
+            notification_type='task_assigned',
+            title=f"Task reassigned: {instance.title}",
+            message=f"You've been assigned the task '{instance.title}' previously assigned to {previous_assignee_name or 'no one'}.",
+            content_object=instance,
+            action_url=f"/tasks/{instance.id}/",
+            action_label="View Task",
+            priority='high'
+        )
 
 
 # Section Management Signals
@@ -169,9 +259,9 @@ def task_status_change_notification(sender, instance, **kwargs):
 @receiver(post_save, sender=ProposalSection)
 def section_assignment_notification(sender, instance, created, **kwargs):
     """Notify when sections are assigned"""
-    if created and instance.assigned_to:
-        notification_service.create_notification(
-            user=instance.assigned_to,
+    if created and instance.assigned_to_id:
+        notification_service.queue_notification(
+            user=instance.assigned_to_id,
             notification_type='task_assigned',
             title=f"Section assigned: {instance.title}",
             message=f"You've been assigned to write section {instance.section_number}: {instance.title}",
@@ -186,18 +276,16 @@ def section_assignment_notification(sender, instance, created, **kwargs):
 def section_reviewer_notification(sender, instance, action, pk_set, **kwargs):
     """Notify when reviewers are added to sections"""
     if action == 'post_add' and pk_set:
-        reviewers = User.objects.filter(pk__in=pk_set)
-        for reviewer in reviewers:
-            notification_service.create_notification(
-                user=reviewer,
-                notification_type='review_request',
-                title=f"Review requested: {instance.title}",
-                message=f"You've been asked to review section {instance.section_number}: {instance.title}",
-                content_object=instance,
-                action_url=f"/sections/{instance.id}/review/",
-                action_label="Review Section",
-                priority='medium'
-            )
+        notification_service.queue_notifications(
+            pk_set,
+            notification_type='review_request',
+            title=f"Review requested: {instance.title}",
+            message=f"You've been asked to review section {instance.section_number}: {instance.title}",
+            content_object=instance,
+            action_url=f"/sections/{instance.id}/review/",
+            action_label="Review Section",
+            priority='medium'
+        )
 
 
 # Comment and Communication Signals
@@ -206,57 +294,74 @@ def section_reviewer_notification(sender, instance, action, pk_set, **kwargs):
 def comment_notification(sender, instance, created, **kwargs):
     """Notify when comments are posted"""
     if created:
-        # Notify mentioned users
-        for mentioned_user in instance.mentioned_users.all():
-            if mentioned_user != instance.author:
-                notification_service.create_notification(
-                    user=mentioned_user,
-                    notification_type='comment_mention',
-                    title=f"Mentioned in comment by {instance.author.get_full_name()}",
-                    message=f"You were mentioned in a comment: {instance.content[:100]}...",
-                    content_object=instance,
-                    action_url=f"/teams/{instance.team.id}/comments/{instance.id}/",
-                    action_label="View Comment",
-                    priority='medium'
-                )
+        # Mentions are usually attached after the row is inserted, so read them after commit
+        transaction.on_commit(lambda: _notify_comment_recipients(instance))
+
+
+def _notify_comment_recipients(instance):
+    """Queue one notification per user a new comment concerns"""
+    author_name = _user_full_name(instance, 'author')
+    excerpt = instance.content[:100]
+    comment_url = f"/teams/{instance.team_id}/comments/{instance.id}/"
+    
+    # One notification per recipient; rules run strongest first (mention > reply > owner)
+    recipients = {}
+    
+    # Notify mentioned users
+    for user_id in instance.mentioned_users.values_list('id', flat=True):
+        recipients.setdefault(user_id, dict(
+            notification_type='comment_mention',
+            title=f"Mentioned in comment by {author_name}",
+            message=f"You were mentioned in a comment: {excerpt}...",
+            content_object=instance,
+            action_url=comment_url,
+            action_label="View Comment",
+            priority='medium'
+        ))
+    
+    if instance.parent_comment_id or instance.task_id or instance.section_id:
+        # Load the reply target, task and section in one joined query
+        comment = TeamComment.objects.select_related('parent_comment', 'task', 'section').get(pk=instance.pk)
         
         # Notify parent comment author for replies
-        if instance.parent_comment and instance.parent_comment.author != instance.author:
-            notification_service.create_notification(
-                user=instance.parent_comment.author,
+        if comment.parent_comment:
+            recipients.setdefault(comment.parent_comment.author_id, dict(
                 notification_type='comment_reply',
-                title=f"Reply to your comment",
-                message=f"{instance.author.get_full_name()} replied to your comment: {instance.content[:100]}...",
+                title="Reply to your comment",
+                message=f"{author_name} replied to your comment: {excerpt}...",
                 content_object=instance,
-                action_url=f"/teams/{instance.team.id}/comments/{instance.id}/",
+                action_url=comment_url,
                 action_label="View Reply",
                 priority='medium'
-            )
+            ))
         
         # Notify task/section assignees for context-specific comments
-        if instance.task and instance.task.assigned_to and instance.task.assigned_to != instance.author:
-            notification_service.create_notification(
-                user=instance.task.assigned_to,
+        task = comment.task
+        if task and task.assigned_to_id:
+            recipients.setdefault(task.assigned_to_id, dict(
                 notification_type='comment_mention',
-                title=f"Comment on your task: {instance.task.title}",
-                message=f"{instance.author.get_full_name()} commented on your task: {instance.content[:100]}...",
-                content_object=instance.task,
-                action_url=f"/tasks/{instance.task.id}/comments/",
+                title=f"Comment on your task: {task.title}",
+                message=f"{author_name} commented on your task: {excerpt}...",
+                content_object=task,
+                action_url=f"/tasks/{task.id}/comments/",
                 action_label="View Comments",
                 priority='medium'
-            )
+            ))
         
-        if instance.section and instance.section.assigned_to and instance.section.assigned_to != instance.author:
-            notification_service.create_notification(
-                user=instance.section.assigned_to,
+        section = comment.section
+        if section and section.assigned_to_id:
+            recipients.setdefault(section.assigned_to_id, dict(
                 notification_type='comment_mention',
-                title=f"Comment on your section: {instance.section.title}",
-                message=f"{instance.author.get_full_name()} commented on your section: {instance.content[:100]}...",
-                content_object=instance.section,
-                action_url=f"/sections/{instance.section.id}/comments/",
+                title=f"Comment on your section: {section.title}",
+                message=f"{author_name} commented on your section: {excerpt}...",
+                content_object=section,
+                action_url=f"/sections/{section.id}/comments/",
                 action_label="View Comments",
                 priority='medium'
-            )
+            ))
+    
+    recipients.pop(instance.author_id, None)
+    notification_service.queue_recipient_notifications(recipients)
 
 
 # Milestone and Deadline Signals
@@ -264,14 +369,14 @@ def comment_notification(sender, instance, created, **kwargs):
 @receiver(post_save, sender=ProposalMilestone)
 def milestone_notification(sender, instance, created, **kwargs):
     """Notify when milestones are created or approaching"""
-    if created and instance.responsible_person:
-        notification_service.create_notification(
-            user=instance.responsible_person,
+    if created and instance.responsible_person_id:
+        notification_service.queue_notification(
+            user=instance.responsible_person_id,
             notification_type='milestone_approaching',
             title=f"New milestone assigned: {instance.title}",
-            message=f"You're responsible for the milestone '{instance.title}' due on {instance.target_date.strftime('%B %d, %Y')}",
+            message=f"You're responsible for the milestone '{instance.title}' due on {_long_date(instance.target_date.date())}",
             content_object=instance,
-            action_url=f"/teams/{instance.team.id}/milestones/{instance.id}/",
+            action_url=f"/teams/{instance.team_id}/milestones/{instance.id}/",
             action_label="View Milestone",
             priority='high'
         )
@@ -282,122 +387,117 @@ def milestone_notification(sender, instance, created, **kwargs):
 @receiver(post_save, sender=TimeLog)
 def time_log_notification(sender, instance, created, **kwargs):
     """Notify when time logs need approval"""
-    if created and instance.team.lead and instance.team.lead != instance.user:
-        notification_service.create_notification(
-            user=instance.team.lead,
+    if created and instance.team.lead_id and instance.team.lead_id != instance.user_id:
+        notification_service.queue_notification(
+            user=instance.team.lead_id,
             notification_type='review_request',
             title=f"Time log approval needed",
-            message=f"{instance.user.get_full_name()} logged {instance.hours} hours for review",
+            message=f"{_user_full_name(instance, 'user')} logged {instance.hours} hours for review",
             content_object=instance,
-            action_url=f"/teams/{instance.team.id}/time-logs/",
+            action_url=f"/teams/{instance.team_id}/time-logs/",
             action_label="Review Time Logs",
             priority='low'
         )
 
 
-# Opportunity and Deadline Signals
-
-@receiver(post_save, sender=Opportunity)
-def opportunity_deadline_notification(sender, instance, created, **kwargs):
-    """Notify teams about upcoming opportunity deadlines"""
-    if not created and instance.response_date:
-        # Check if deadline is approaching (within 7 days)
-        days_until_deadline = (instance.response_date.date() - timezone.now().date()).days
-        
-        if days_until_deadline <= 7 and days_until_deadline > 0:
-            try:
-                team = instance.proposal_team
-                notification_service.notify_team_members(
-                    team=team,
-                    notification_type='opportunity_deadline',
-                    title=f"Deadline approaching: {instance.solicitation_number}",
-                    message=f"Only {days_until_deadline} days left to submit proposal for {instance.solicitation_number}",
-                    content_object=instance,
-                    action_url=f"/opportunities/{instance.id}/",
-                    action_label="View Opportunity",
-                    priority='urgent' if days_until_deadline <= 3 else 'high'
-                )
-            except ProposalTeam.DoesNotExist:
-                pass
-
-
 # Daily/Periodic Notification Checks (to be called by Celery tasks)
 
 def check_overdue_tasks():
     """Check for overdue tasks and send notifications"""
-    overdue_tasks = TaskItem.objects.filter(
-        due_date__lt=timezone.now(),
+    now = timezone.now()
+    overdue_tasks = list(TaskItem.objects.filter(
+        due_date__lt=now,
         status__in=['todo', 'in_progress'],
         assigned_to__isnull=False
-    )
+    ).select_related('assigned_to').only(*TASK_NOTIFICATION_FIELDS))
+    
+    if not overdue_tasks:
+        return
+    
+    # Tasks whose assignee already got an overdue notification today, in one query.
+    # A created_at range (not __date) lets notif_dedup_idx serve the whole lookup.
+    task_type = ContentType.objects.get_for_model(TaskItem)
+    start_of_day = timezone.localtime(now).replace(hour=0, minute=0, second=0, microsecond=0)
+    sent_today = set(Notification.objects.filter(
+        content_type=task_type,
+        object_id__in=[task.id for task in overdue_tasks],
+        notification_type='task_overdue',
+        created_at__gte=start_of_day
+    ).values_list('object_id', 'user_id'))
     
-    for task in overdue_tasks:
-        # Check if we already sent an overdue notification today
-        today = timezone.now().date()
-        existing_notification = task.assigned_to.notifications.filter(
+    notification_service.create_notifications([
+        notification_service._build_notification(
+            user=task.assigned_to,
             notification_type='task_overdue',
-            content_type__model='taskitem',
-            object_id=task.id,
-            created_at__date=today
-        ).exists()
-        
-        if not existing_notification:
-            notification_service.create_notification(
-                user=task.assigned_to,
-                notification_type='task_overdue',
-                title=f"Overdue task: {task.title}",
-                message=f"Your task '{task.title}' was due on {task.due_date.strftime('%B %d, %Y')}",
-                content_object=task,
-                action_url=f"/tasks/{task.id}/",
-                action_label="View Task",
-                priority='urgent'
-            )
+            title=f"Overdue task: {task.title}",
+            message=f"Your task '{task.title}' was due on {_long_date(task.due_date.date())}",
+            content_object=task,
+            content_type=task_type,
+            action_url=f"/tasks/{task.id}/",
+            action_label="View Task",
+            priority='urgent'
+        )
+        for task in overdue_tasks
+        if (task.id, task.assigned_to_id) not in sent_today
+    ])
 
 
 def check_approaching_deadlines():
     """Check for approaching task and milestone deadlines"""
-    tomorrow = timezone.now() + timedelta(days=1)
-    next_week = timezone.now() + timedelta(days=7)
+    now = timezone.now()
+    today = timezone.localdate(now)
+    next_week = now + timedelta(days=7)
     
     # Tasks due tomorrow
     tasks_due_tomorrow = TaskItem.objects.filter(
-        due_date__date=tomorrow.date(),
+        due_date__date=today + timedelta(days=1),
         status__in=['todo', 'in_progress'],
         assigned_to__isnull=False
-    )
+    ).select_related('assigned_to').only(*TASK_NOTIFICATION_FIELDS)
     
-    for task in tasks_due_tomorrow:
-        notification_service.create_notification(
+    task_type = ContentType.objects.get_for_model(TaskItem)
+    notification_service.create_notifications([
+        notification_service._build_notification(
             user=task.assigned_to,
             notification_type='task_due',
             title=f"Task due tomorrow: {task.title}",
-            message=f"Your task '{task.title}' is due tomorrow ({task.due_date.strftime('%B %d, %Y')})",
+            message=f"Your task '{task.title}' is due tomorrow ({_long_date(task.due_date.date())})",
             content_object=task,
+            content_type=task_type,
             action_url=f"/tasks/{task.id}/",
             action_label="View Task",
             priority='high'
         )
+        for task in tasks_due_tomorrow
+    ])
     
     # Milestones due within a week
     milestones_due_soon = ProposalMilestone.objects.filter(
-        target_date__lte=next_week,
-        target_date__gte=timezone.now(),
         is_completed=False,
+        target_date__gte=now,
+        target_date__lte=next_week,
         responsible_person__isnull=False
+    ).select_related('responsible_person').only(
+        'id', 'title', 'target_date', 'team_id',
+        'responsible_person__first_name', 'responsible_person__last_name', 'responsible_person__email'
     )
     
+    milestone_type = ContentType.objects.get_for_model(ProposalMilestone)
+    notifications = []
     for milestone in milestones_due_soon:
-        days_left = (milestone.target_date.date() - timezone.now().date()).days
-        notification_service.create_notification(
+        days_left = (timezone.localdate(milestone.target_date) - today).days
+        notifications.append(notification_service._build_notification(
             user=milestone.responsible_person,
             notification_type='milestone_approaching',
             title=f"Milestone due in {days_left} days: {milestone.title}",
-            message=f"Milestone '{milestone.title}' is due on {milestone.target_date.strftime('%B %d, %Y')}",
+            message=f"Milestone '{milestone.title}' is due on {_long_date(milestone.target_date.date())}",
             content_object=milestone,
-            action_url=f"/teams/{milestone.team.id}/milestones/{milestone.id}/",
+            content_type=milestone_type,
+            action_url=f"/teams/{milestone.team_id}/milestones/{milestone.id}/",
             action_label="View Milestone",
             priority='high' if days_left <= 3 else 'medium'
-        )
+        ))
+    notification_service.create_notifications(notifications)
 
 
 def check_inactive_teams():
@@ -407,26 +507,65 @@ def check_inactive_teams():
     inactive_teams = ProposalTeam.objects.filter(
         status='active',
         updated_at__lt=week_ago
-    ).exclude(
-        # Exclude teams with recent task updates
-        tasks__updated_at__gte=week_ago
-    ).exclude(
-        # Exclude teams with recent comments
-        comments__created_at__gte=week_ago
+    ).filter(
+        # Exclude teams with recent task updates or comments
+        ~Exists(TaskItem.objects.filter(team_id=OuterRef('pk'), updated_at__gte=week_ago)),
+        ~Exists(TeamComment.objects.filter(team_id=OuterRef('pk'), created_at__gte=week_ago))
+    ).select_related('lead').only(
+        'id', 'name', 'lead__first_name', 'lead__last_name', 'lead__email'
     )
     
-    for team in inactive_teams:
-        if team.lead:
-            notification_service.create_notification(
-                user=team.lead,
-                notification_type='system_update',
-                title=f"Team inactivity alert: {team.name}",
-                message=f"No activity detected for team {team.name} in the past week",
-                content_object=team,
-                action_url=f"/teams/{team.id}/",
-                action_label="View Team",
-                priority='medium'
-            )
+    team_type = ContentType.objects.get_for_model(ProposalTeam)
+    notification_service.create_notifications([
+        notification_service._build_notification(
+            user=team.lead,
+            notification_type='system_update',
+            title=f"Team inactivity alert: {team.name}",
+            message=f"No activity detected for team {team.name} in the past week",
+            content_object=team,
+            content_type=team_type,
+            action_url=f"/teams/{team.id}/",
+            action_label="View Team",
+            priority='medium'
+        )
+        for team in inactive_teams
+        if team.lead
+    ])
+
+
+def check_opportunity_deadlines():
+    """Notify proposal team members whose opportunity response date is within a week"""
+    today = timezone.localdate()
+    
+    opportunities = Opportunity.objects.filter(
+        response_date__date__gt=today,
+        response_date__date__lte=today + timedelta(days=7)
+    ).only('id', 'solicitation_number', 'response_date').in_bulk()
+    if not opportunities:
+        return
+    
+    memberships = TeamMembership.objects.filter(
+        is_active=True,
+        team__opportunity_id__in=opportunities
+    ).select_related('user', 'team')
+    
+    opportunity_type = ContentType.objects.get_for_model(Opportunity)
+    notifications = []
+    for membership in memberships:
+        opportunity = opportunities[membership.team.opportunity_id]
+        days_until_deadline = (timezone.localdate(opportunity.response_date) - today).days
+        notifications.append(notification_service._build_notification(
+            user=membership.user,
+            notification_type='opportunity_deadline',
+            title=f"Deadline approaching: {opportunity.solicitation_number}",
+            message=f"Only {days_until_deadline} days left to submit proposal for {opportunity.solicitation_number}",
+            content_object=opportunity,
+            content_type=opportunity_type,
+            action_url=f"/opportunities/{opportunity.id}/",
+            action_label="View Opportunity",
+            priority='urgent' if days_until_deadline <= 3 else 'high'
+        ))
+    notification_service.create_notifications(notifications)
 
 
 logger.info("BLACK CORAL notification signals registered")
\ No newline at end of file
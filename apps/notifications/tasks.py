@@ -4,8 +4,10 @@ Celery tasks for scheduled notification delivery and background processing
 """
 
 import logging
+from collections import Counter
 from datetime import datetime, timedelta
-from celery import shared_task
+from itertools import islice
+from celery import group, shared_task
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 
@@ -13,13 +15,20 @@ from .services import notification_service
 from .signals import (
     check_overdue_tasks, 
     check_approaching_deadlines, 
-    check_inactive_teams
+    check_inactive_teams,
+    check_opportunity_deadlines
 )
-from .models import Notification, NotificationDigest, AlertRule
+from .models import Notification, NotificationDigest, AlertRule, WebhookEndpoint
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
 
+# Notifications per delivery sub-task when a batch is fanned out across workers
+DELIVERY_CHUNK_SIZE = 100
+
+# Rows removed per DELETE transaction during cleanup
+CLEANUP_BATCH_SIZE = 10000
+
 
 @shared_task(bind=True, max_retries=3)
 def process_pending_notifications(self):
@@ -73,19 +82,63 @@ def process_alert_rules(self):
 def check_deadline_notifications(self):
     """Check for approaching deadlines and overdue items"""
     try:
-        # Check for overdue tasks
-        check_overdue_tasks()
+        # The three checks share no data, so run them side by side on the worker pool
+        group(
+            check_overdue_task_notifications.s(),
+            check_approaching_deadline_notifications.s(),
+            check_inactive_team_notifications.s(),
+        ).apply_async()
         
-        # Check for approaching deadlines
+        logger.info("Deadline checks dispatched")
+        return {"status": "dispatched", "message": "Deadline notification checks queued"}
+    except Exception as exc:
+        logger.error(f"Failed to check deadlines: {exc}")
+        raise self.retry(exc=exc, countdown=180)
+
+
+@shared_task(bind=True, max_retries=3)
+def check_overdue_task_notifications(self):
+    """Notify assignees about overdue tasks"""
+    try:
+        check_overdue_tasks()
+        return {"status": "success", "message": "Overdue tasks checked"}
+    except Exception as exc:
+        logger.error(f"Failed to check overdue tasks: {exc}")
+        raise self.retry(exc=exc, countdown=180)
+
+
+@shared_task(bind=True, max_retries=3)
+def check_approaching_deadline_notifications(self):
+    """Notify assignees about tasks due soon"""
+    try:
         check_approaching_deadlines()
-        
-        # Check for inactive teams
+        return {"status": "success", "message": "Approaching deadlines checked"}
+    except Exception as exc:
+        logger.error(f"Failed to check approaching deadlines: {exc}")
+        raise self.retry(exc=exc, countdown=180)
+
+
+@shared_task(bind=True, max_retries=3)
+def check_inactive_team_notifications(self):
+    """Notify team leads about inactive teams"""
+    try:
         check_inactive_teams()
+        return {"status": "success", "message": "Inactive teams checked"}
+    except Exception as exc:
+        logger.error(f"Failed to check inactive teams: {exc}")
+        raise self.retry(exc=exc, countdown=180)
+
+
+@shared_task(bind=True, max_retries=3)
+def check_opportunity_deadline_notifications(self):
+    """Remind proposal teams about opportunity response dates due within a week"""
+    try:
+        check_opportunity_deadlines()
         
-        logger.info("Deadline check completed successfully")
-        return {"status": "success", "message": "Deadline notifications checked"}
+        logger.info("Opportunity deadline check completed successfully")
+        return {"status": "success", "message": "Opportunity deadlines checked"}
     except Exception as exc:
-        logger.error(f"Failed to check deadlines: {exc}")
+        logger.error(f"Failed to check opportunity deadlines: {exc}")
         raise self.retry(exc=exc, countdown=180)
 
 
@@ -93,23 +146,23 @@ def check_deadline_notifications(self):
 def cleanup_expired_notifications(self):
     """Clean up expired notifications"""
     try:
-        # Delete expired notifications
-        expired_count = Notification.objects.filter(
-            expires_at__lt=timezone.now()
-        ).delete()[0]
-        
-        # Delete old read notifications (older than 90 days)
-        old_date = timezone.now() - timedelta(days=90)
-        old_read_count = Notification.objects.filter(
-            status='read',
-            read_at__lt=old_date
-        ).delete()[0]
-        
-        # Delete old dismissed notifications (older than 30 days)
-        old_dismissed_count = Notification.objects.filter(
-            status='dismissed',
-            updated_at__lt=timezone.now() - timedelta(days=30)
-        ).delete()[0]
+        from django.db.models import Count, Q
+        
+        now = timezone.now()
+        expired = Q(expires_at__lt=now)
+        # Old read notifications (older than 90 days) and old dismissed ones (older than 30 days)
+        old_read = Q(status='read', read_at__lt=now - timedelta(days=90)) & ~expired
+        old_dismissed = Q(status='dismissed', updated_at__lt=now - timedelta(days=30)) & ~expired
+        
+        stale = Notification.objects.filter(expired | old_read | old_dismissed)
+        counts = stale.aggregate(
+            expired=Count('id', filter=expired),
+            old_read=Count('id', filter=old_read),
+            old_dismissed=Count('id', filter=old_dismissed)
+        )
+        expired_count, old_read_count, old_dismissed_count = counts['expired'], counts['old_read'], counts['old_dismissed']
+        
+        stale.purge(batch_size=CLEANUP_BATCH_SIZE)
         
         logger.info(f"Cleanup completed: {expired_count} expired, {old_read_count} old read, {old_dismissed_count} old dismissed")
         
@@ -124,11 +177,97 @@ def cleanup_expired_notifications(self):
         raise self.retry(exc=exc, countdown=300)
 
 
+@shared_task(bind=True, max_retries=3, acks_late=True)
+def deliver_notification(self, notification_id):
+    """Deliver a newly created notification outside the request cycle"""
+    try:
+        notification = Notification.objects.for_delivery().get(id=notification_id, status='pending')
+        notification_service._deliver_notification(notification)
+        
+        return {"status": notification.status, "notification_id": notification_id}
+        
+    except Notification.DoesNotExist:
+        logger.warning(f"Notification not pending or missing: {notification_id}")
+        return {"status": "skipped", "notification_id": notification_id}
+    except Exception as exc:
+        logger.error(f"Failed to deliver notification {notification_id}: {exc}")
+        raise self.retry(exc=exc, countdown=60)
+
+
+@shared_task(bind=True, max_retries=3, acks_late=True)
+def create_queued_notifications(self, groups):
+    """Persist notifications queued by model signals outside the request cycle"""
+    try:
+        notifications = notification_service.create_queued_notifications(groups)
+        
+        return {"status": "success", "created": len(notifications)}
+        
+    except Exception as exc:
+        logger.error(f"Failed to create queued notifications: {exc}")
+        raise self.retry(exc=exc, countdown=60)
+
+
+def webhook_recipients(payload):
+    """Return the recipient emails of a webhook payload, raising ValueError if malformed"""
+    if not isinstance(payload, dict):
+        raise ValueError('payload must be a JSON object')
+    emails = payload.get('user_emails')
+    if emails is not None:
+        if not isinstance(emails, list) or not emails or not all(isinstance(email, str) for email in emails):
+            raise ValueError('user_emails must be a non-empty list of strings')
+        return emails
+    email = payload.get('user_email')
+    if not isinstance(email, str) or not email:
+        raise ValueError('user_email or user_emails required')
+    return [email]
+
+
+@shared_task(bind=True, max_retries=3, acks_late=True)
+def process_webhook_notification(self, payload):
+    """Create notifications for a payload accepted by the webhook endpoint"""
+    try:
+        emails = webhook_recipients(payload)
+    except ValueError as exc:
+        # A malformed payload fails the same way on every attempt, so don't retry it
+        logger.error(f"Rejected webhook notification payload: {exc}")
+        return {"status": "error", "message": str(exc)}
+
+    try:
+        # One user lookup and one bulk insert for every recipient
+        users = list(User.objects.filter(email__in=emails))
+        notifications = notification_service.notify_multiple_users(
+            users=users,
+            notification_type=payload.get('type', 'system_update'),
+            title=payload.get('title', 'External Notification'),
+            message=payload.get('message', ''),
+            priority=payload.get('priority', 'medium'),
+            metadata=payload.get('metadata', {})
+        )
+
+        found = {user.email for user in users}
+        missing = [email for email in emails if email not in found]
+        if missing:
+            logger.warning(f"Webhook notification recipients not found: {missing}")
+
+        return {
+            "status": "success",
+            "notification_ids": [notification.id for notification in notifications],
+            "missing_emails": missing
+        }
+
+    except (KeyError, ValueError) as exc:
+        logger.error(f"Rejected webhook notification payload: {exc}")
+        return {"status": "error", "message": str(exc)}
+    except Exception as exc:
+        logger.error(f"Failed to process webhook notification: {exc}")
+        raise self.retry(exc=exc, countdown=60)
+
+
 @shared_task(bind=True, max_retries=3)
 def send_notification_email(self, notification_id):
     """Send individual notification via email"""
     try:
-        notification = Notification.objects.get(id=notification_id)
+        notification = Notification.objects.for_delivery().get(id=notification_id)
         success = notification_service._send_email_notification(notification)
         
         if success:
@@ -150,7 +289,7 @@ def send_notification_email(self, notification_id):
 def send_webhook_notification(self, notification_id, service_type):
     """Send individual notification via webhook"""
     try:
-        notification = Notification.objects.get(id=notification_id)
+        notification = Notification.objects.for_delivery().get(id=notification_id)
         success = notification_service._send_webhook_notification(notification, service_type)
         
         if success:
@@ -168,25 +307,52 @@ def send_webhook_notification(self, notification_id, service_type):
         raise self.retry(exc=exc, countdown=60)
 
 
+@shared_task(bind=True, max_retries=3)
+def send_webhook_batch(self, notification_ids, service_type):
+    """Send many notifications to their webhook endpoints concurrently in one dispatch"""
+    try:
+        endpoints = list(WebhookEndpoint.objects.filter(service_type=service_type, is_active=True))
+        notifications = Notification.objects.filter(id__in=notification_ids).for_delivery()
+        
+        deliveries = [
+            (endpoint, endpoint.build_payload(notification))
+            for notification in notifications
+            for endpoint in endpoints
+            if notification.notification_type in endpoint.notification_types
+        ]
+        results = WebhookEndpoint.dispatch_batch(deliveries)
+        
+        success_count = sum(results)
+        logger.info(f"Webhook batch to {service_type}: {success_count} sent, {len(results) - success_count} failed")
+        
+        return {
+            "status": "completed",
+            "service": service_type,
+            "success_count": success_count,
+            "failure_count": len(results) - success_count
+        }
+        
+    except Exception as exc:
+        logger.error(f"Failed webhook batch to {service_type}: {exc}")
+        raise self.retry(exc=exc, countdown=60)
+
+
 @shared_task(bind=True, max_retries=3)
 def batch_notification_delivery(self, notification_ids):
     """Deliver multiple notifications in batch"""
+    if len(notification_ids) > DELIVERY_CHUNK_SIZE:
+        return _fan_out_delivery(self, notification_ids)
+    
     try:
-        notifications = Notification.objects.filter(
+        notifications = list(Notification.objects.filter(
             id__in=notification_ids,
             status='pending'
-        )
+        ).for_delivery().with_targets())
         
-        success_count = 0
-        failure_count = 0
+        notification_service._deliver_many(notifications)
         
-        for notification in notifications:
-            try:
-                notification_service._deliver_notification(notification)
-                success_count += 1
-            except Exception as e:
-                logger.error(f"Failed to deliver notification {notification.id}: {e}")
-                failure_count += 1
+        success_count = sum(1 for notification in notifications if notification.status == 'sent')
+        failure_count = len(notifications) - success_count
         
         logger.info(f"Batch delivery completed: {success_count} success, {failure_count} failures")
         
@@ -202,46 +368,49 @@ def batch_notification_delivery(self, notification_ids):
         raise self.retry(exc=exc, countdown=120)
 
 
+def _fan_out_delivery(task, notification_ids):
+    """Split a large delivery batch into sub-tasks on the same queue so the worker pool sends them in parallel"""
+    ids = iter(notification_ids)
+    chunks = []
+    while chunk := list(islice(ids, DELIVERY_CHUNK_SIZE)):
+        chunks.append(chunk)
+    
+    queue = (task.request.delivery_info or {}).get('routing_key')
+    options = {'queue': queue} if queue else {}
+    group(batch_notification_delivery.s(chunk).set(**options) for chunk in chunks).apply_async()
+    
+    logger.info(f"Split delivery of {len(notification_ids)} notifications into {len(chunks)} sub-tasks")
+    return {
+        "status": "dispatched",
+        "chunks": len(chunks),
+        "total": len(notification_ids)
+    }
+
+
 @shared_task(bind=True, max_retries=3)
 def generate_notification_analytics(self):
     """Generate notification analytics and reports"""
     try:
-        from django.db.models import Count, Q
+        from django.db.models import Count
         
-        # Calculate analytics for the past 30 days
+        # Calculate analytics for the past 30 days from one grouped scan
         thirty_days_ago = timezone.now() - timedelta(days=30)
         
+        by_type, by_priority, delivery_status = Counter(), Counter(), Counter()
+        for row in Notification.objects.filter(
+            created_at__gte=thirty_days_ago
+        ).values('notification_type', 'priority', 'status').annotate(count=Count('id')).order_by():
+            by_type[row['notification_type']] += row['count']
+            by_priority[row['priority']] += row['count']
+            delivery_status[row['status']] += row['count']
+        
+        total_sent = sum(delivery_status.values())
         analytics = {
-            'total_sent': Notification.objects.filter(
-                created_at__gte=thirty_days_ago
-            ).count(),
-            'by_type': dict(
-                Notification.objects.filter(
-                    created_at__gte=thirty_days_ago
-                ).values('notification_type').annotate(
-                    count=Count('id')
-                ).values_list('notification_type', 'count')
-            ),
-            'by_priority': dict(
-                Notification.objects.filter(
-                    created_at__gte=thirty_days_ago
-                ).values('priority').annotate(
-                    count=Count('id')
-                ).values_list('priority', 'count')
-            ),
-            'delivery_status': dict(
-                Notification.objects.filter(
-                    created_at__gte=thirty_days_ago
-                ).values('status').annotate(
-                    count=Count('id')
-                ).values_list('status', 'count')
-            ),
-            'read_rate': Notification.objects.filter(
-                created_at__gte=thirty_days_ago,
-                status='read'
-            ).count() / max(1, Notification.objects.filter(
-                created_at__gte=thirty_days_ago
-            ).count()) * 100
+            'total_sent': total_sent,
+            'by_type': dict(by_type),
+            'by_priority': dict(by_priority),
+            'delivery_status': dict(delivery_status),
+            'read_rate': delivery_status['read'] / max(1, total_sent) * 100
         }
         
         # Store analytics in cache or database
@@ -262,22 +431,26 @@ def process_notification_templates(self):
     try:
         from .models import NotificationTemplate
         
-        templates = NotificationTemplate.objects.all()
+        templates = NotificationTemplate.objects.only(
+            'id', 'notification_type', 'title_template', 'message_template',
+            'email_subject_template', 'email_body_template'
+        ).iterator(chunk_size=500)
         processed_count = 0
         error_count = 0
         
+        # Test template rendering with one sample context
+        now = timezone.now()
+        test_context = {
+            'user_name': 'Test User',
+            'user_first_name': 'Test',
+            'user_email': 'test@example.com',
+            'object_title': 'Test Object',
+            'current_date': now.date(),
+            'current_time': now.time(),
+        }
+        
         for template in templates:
             try:
-                # Test template rendering with sample context
-                test_context = {
-                    'user_name': 'Test User',
-                    'user_first_name': 'Test',
-                    'user_email': 'test@example.com',
-                    'object_title': 'Test Object',
-                    'current_date': timezone.now().date(),
-                    'current_time': timezone.now().time(),
-                }
-                
                 # Try rendering templates
                 template.render_title(test_context)
                 template.render_message(test_context)
@@ -307,45 +480,4 @@ def process_notification_templates(self):
         raise self.retry(exc=exc, countdown=300)
 
 
-# Periodic task setup helpers
-def setup_periodic_tasks():
-    """Setup periodic notification tasks"""
-    from celery.schedules import crontab
-    from django.conf import settings
-    
-    # This would be called during app initialization
-    periodic_tasks = {
-        'process-pending-notifications': {
-            'task': 'apps.notifications.tasks.process_pending_notifications',
-            'schedule': 60.0,  # Every minute
-        },
-        'check-deadline-notifications': {
-            'task': 'apps.notifications.tasks.check_deadline_notifications', 
-            'schedule': crontab(hour='*', minute=0),  # Every hour
-        },
-        'create-daily-digests': {
-            'task': 'apps.notifications.tasks.create_daily_digests',
-            'schedule': crontab(hour=8, minute=0),  # Daily at 8 AM
-        },
-        'create-weekly-digests': {
-            'task': 'apps.notifications.tasks.create_weekly_digests',
-            'schedule': crontab(hour=8, minute=0, day_of_week=1),  # Monday at 8 AM
-        },
-        'process-alert-rules': {
-            'task': 'apps.notifications.tasks.process_alert_rules',
-            'schedule': crontab(minute='*/15'),  # Every 15 minutes
-        },
-        'cleanup-expired-notifications': {
-            'task': 'apps.notifications.tasks.cleanup_expired_notifications',
-            'schedule': crontab(hour=2, minute=0),  # Daily at 2 AM
-        },
-        'generate-notification-analytics': {
-            'task': 'apps.notifications.tasks.generate_notification_analytics',
-            'schedule': crontab(hour=1, minute=0),  # Daily at 1 AM
-        },
-    }
-    
-    return periodic_tasks
-
-
 logger.info("BLACK CORAL notification tasks registered")
\ No newline at end of file
@@ -3,6 +3,16 @@ BLACK CORAL Notification System Tests
 Test notification creation, delivery, and management
 """
 
+import csv
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from django.core import mail
+from django.core.management import call_command
+from django.core.mail import get_connection
 from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 from django.utils import timezone
@@ -13,13 +23,18 @@ from apps.notifications.models import (
     NotificationDigest, AlertRule, WebhookEndpoint
 )
 from apps.notifications.services import notification_service
+from apps.notifications.tasks import (
+    batch_notification_delivery, cleanup_expired_notifications, create_queued_notifications,
+    deliver_notification, process_webhook_notification
+)
 
 User = get_user_model()
 
 
 class NotificationServiceTests(TestCase):
-    def setUp(self):
-        self.user = User.objects.create_user(
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
             username='testuser',
             email='test@blackcoral.ai',
             first_name='Test',
@@ -106,6 +121,9 @@ class NotificationServiceTests(TestCase):
         
         unread_count = notification_service.get_unread_count(self.user)
         self.assertEqual(unread_count, 1)
+        
+        notification_service.mark_notification_read(notification1.id, self.user)
+        self.assertEqual(notification_service.get_unread_count(self.user), 0)
 
     def test_notify_multiple_users(self):
         """Test notifying multiple users"""
@@ -127,6 +145,48 @@ class NotificationServiceTests(TestCase):
         self.assertEqual(len(notifications), 2)
         self.assertEqual(notifications[0].user, self.user)
         self.assertEqual(notifications[1].user, user2)
+        self.assertTrue(all(n.pk for n in notifications))
+        self.assertEqual(notifications[1].recipient_name, 'Test2 User2')
+
+    def test_queue_notifications_creates_on_commit(self):
+        """Test queued notifications are only created once the transaction commits"""
+        user2 = User.objects.create_user(username='testuser2', first_name='Test2', last_name='User2')
+        
+        with patch.object(create_queued_notifications, 'delay', side_effect=create_queued_notifications), \
+                self.captureOnCommitCallbacks(execute=True):
+            notification_service.queue_notifications(
+                [self.user, user2.pk],
+                notification_type='review_request',
+                title='Review requested',
+                message='Please review',
+                content_object=user2
+            )
+            self.assertFalse(Notification.objects.exists())
+        
+        notifications = Notification.objects.order_by('user_id')
+        self.assertEqual(notifications.count(), 2)
+        self.assertEqual(notifications[1].recipient_name, 'Test2 User2')
+        self.assertEqual(notifications[1].content_object, user2)
+
+    @patch.object(notification_service, '_create_user_digest')
+    def test_create_digest_notifications_selects_subscribers(self, mock_create_user_digest):
+        """Test digests go to users subscribed to that digest type"""
+        weekly_user = User.objects.create_user(username='weekly', password='testpass123')
+        NotificationPreference.objects.create(
+            user=self.user, notification_type='task_due', delivery_method='email',
+            daily_digest=True, weekly_digest=True
+        )
+        NotificationPreference.objects.create(
+            user=weekly_user, notification_type='task_due', delivery_method='email',
+            weekly_digest=True
+        )
+
+        notification_service.create_digest_notifications('daily')
+        mock_create_user_digest.assert_called_once_with(self.user, 'daily')
+
+        mock_create_user_digest.reset_mock()
+        notification_service.create_digest_notifications('weekly')
+        self.assertEqual(mock_create_user_digest.call_count, 2)
 
     @override_settings(CACHES={
         'default': {
@@ -148,23 +208,121 @@ class NotificationServiceTests(TestCase):
         # Mock successful email sending
         mock_send_mail.return_value = True
         
-        notification = notification_service.create_notification(
-            user=self.user,
-            notification_type='system_update',
-            title='Email Test',
-            message='This should be sent via email'
-        )
+        with patch.object(deliver_notification, 'apply_async') as mock_apply_async, \
+                self.captureOnCommitCallbacks(execute=True):
+            mock_apply_async.side_effect = lambda args, kwargs=None, **options: deliver_notification(*args)
+            notification = notification_service.create_notification(
+                user=self.user,
+                notification_type='system_update',
+                title='Email Test',
+                message='This should be sent via email'
+            )
         
-        # Check that email was sent (should be called during creation due to immediate preference)
+        # Check that email was sent (queued on commit due to immediate preference)
         self.assertTrue(mock_send_mail.called)
+        self.assertEqual(mock_apply_async.call_args[1]['queue'], 'notifications')
         
         notification.refresh_from_db()
         self.assertEqual(notification.status, 'sent')
 
 
+    def test_batch_delivery_shares_email_connection(self):
+        """Test batch delivery sends every email over one connection"""
+        NotificationPreference.objects.create(
+            user=self.user,
+            notification_type='task_due',
+            delivery_method='email'
+        )
+        notifications = [
+            Notification.objects.create(
+                user=self.user, notification_type='task_due', title=f'Due {i}', message='Soon'
+            )
+            for i in range(2)
+        ]
+
+        with patch('apps.notifications.services.get_connection', wraps=get_connection) as mock_connection:
+            result = batch_notification_delivery([n.id for n in notifications])
+
+        mock_connection.assert_called_once()
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(result['success_count'], 2)
+
+    def test_batch_delivery_loads_webhook_endpoints_once(self):
+        """Test batch delivery posts every notification to the preloaded endpoints"""
+        NotificationPreference.objects.create(
+            user=self.user,
+            notification_type='task_due',
+            delivery_method='slack'
+        )
+        WebhookEndpoint.objects.create(
+            name='Slack', service_type='slack', webhook_url='https://hooks.example.com/a',
+            notification_types=['task_due']
+        )
+        WebhookEndpoint.objects.create(
+            name='Other', service_type='slack', webhook_url='https://hooks.example.com/b',
+            notification_types=['system_update']
+        )
+        notifications = [
+            Notification.objects.create(
+                user=self.user, notification_type='task_due', title=f'Due {i}', message='Soon'
+            )
+            for i in range(2)
+        ]
+
+        with patch.object(WebhookEndpoint, 'send', return_value=True) as mock_send, \
+                patch.object(WebhookEndpoint.objects, 'filter', wraps=WebhookEndpoint.objects.filter) as mock_filter:
+            result = batch_notification_delivery([n.id for n in notifications])
+
+        endpoint_lookups = [call for call in mock_filter.call_args_list if 'is_active' in call.kwargs]
+        self.assertEqual(len(endpoint_lookups), 1)
+        self.assertEqual(mock_send.call_count, 2)
+        self.assertEqual(result['success_count'], 2)
+
+
+    def test_cleanup_expired_notifications(self):
+        """Test cleanup removes expired and stale notifications in one pass"""
+        now = timezone.now()
+        kept = Notification.objects.create(user=self.user, notification_type='task_due', title='Kept', message='m')
+        expired = Notification.objects.create(
+            user=self.user, notification_type='task_due', title='Expired', message='m',
+            expires_at=now - timezone.timedelta(hours=1)
+        )
+        Notification.objects.create(
+            user=self.user, notification_type='task_due', title='Old read', message='m',
+            status='read', read_at=now - timezone.timedelta(days=91)
+        )
+        digest = NotificationDigest.objects.create(
+            user=self.user, digest_type='daily', period_start=now, period_end=now
+        )
+        digest.notifications.add(kept, expired)
+
+        result = cleanup_expired_notifications()
+
+        self.assertEqual((result['expired'], result['old_read'], result['old_dismissed']), (1, 1, 0))
+        self.assertEqual(list(Notification.objects.all()), [kept])
+        self.assertEqual(list(digest.notifications.all()), [kept])
+
+    def test_purge_in_batches(self):
+        """Test batched purge removes every matching row"""
+        Notification.objects.bulk_create([
+            Notification(user=self.user, notification_type='task_due', title=f'N{i}', message='m')
+            for i in range(5)
+        ])
+
+        with patch.object(Notification, 'invalidate_unread_count') as mock_invalidate:
+            deleted = Notification.objects.filter(title__startswith='N').purge(batch_size=2)
+
+        self.assertEqual(deleted, 5)
+        self.assertFalse(Notification.objects.exists())
+        # One invalidation per committed batch, each naming only that batch's recipients
+        self.assertEqual(mock_invalidate.call_count, 3)
+        self.assertTrue(all(set(call.args) == {self.user.pk} for call in mock_invalidate.call_args_list))
+
+
 class NotificationModelTests(TestCase):
-    def setUp(self):
-        self.user = User.objects.create_user(
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
             username='testuser',
             email='test@blackcoral.ai',
             first_name='Test',
@@ -194,6 +352,43 @@ class NotificationModelTests(TestCase):
         
         self.assertTrue(expired_notification.is_expired)
         self.assertFalse(active_notification.is_expired)
+        self.assertEqual(list(Notification.objects.active()), [active_notification])
+
+    def test_user_queryset_helpers(self):
+        """Test for_user, unread and recent compose into the inbox query"""
+        other = User.objects.create_user(username='other', email='other@blackcoral.ai')
+        older, newer = [
+            Notification.objects.create(
+                user=self.user, notification_type='system_update', title=title, message='m', status='sent'
+            )
+            for title in ('Older', 'Newer')
+        ]
+        Notification.objects.create(
+            user=self.user, notification_type='system_update', title='Read', message='m', status='read'
+        )
+        Notification.objects.create(
+            user=other, notification_type='system_update', title='Other', message='m', status='sent'
+        )
+
+        self.assertEqual(list(Notification.objects.for_user(self.user).unread().recent()), [newer, older])
+        self.assertEqual(list(Notification.objects.for_user(self.user).unread().recent(1, offset=1)), [older])
+
+    def test_recipient_name_follows_user_rename(self):
+        """Test denormalized recipient name is set on create and synced on rename"""
+        notification = Notification.objects.create(
+            user=self.user,
+            notification_type='system_update',
+            title='Renamed',
+            message='Recipient name test'
+        )
+        self.assertEqual(notification.recipient_name, 'Test User')
+        self.assertEqual(str(notification), 'Renamed -> Test User')
+
+        self.user.last_name = 'Renamed'
+        self.user.save()
+
+        notification.refresh_from_db()
+        self.assertEqual(notification.recipient_name, 'Test Renamed')
 
     def test_notification_preferences(self):
         """Test notification preference model"""
@@ -211,6 +406,71 @@ class NotificationModelTests(TestCase):
         self.assertEqual(preference.delivery_method, 'email')
         self.assertTrue(preference.is_enabled)
 
+    @override_settings(CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    })
+    def test_preference_vector_cache(self):
+        """Test preference lookups are cached per user and invalidated on change"""
+        preference = NotificationPreference.objects.create(
+            user=self.user,
+            notification_type='task_assigned',
+            delivery_method='email',
+            immediate=True
+        )
+
+        with self.assertNumQueries(1):
+            self.assertEqual(NotificationPreference.for_type(self.user.id, 'task_assigned'), [preference])
+            NotificationPreference.for_type(self.user.id, 'task_assigned')
+
+        preference.is_enabled = False
+        preference.save()
+        self.assertEqual(NotificationPreference.for_type(self.user.id, 'task_assigned'), [])
+
+        other = User.objects.create_user(username='other', password='testpass123')
+        with self.assertNumQueries(1):
+            vectors = NotificationPreference.vectors_for([self.user.id, other.id])
+        self.assertEqual(vectors, {self.user.id: {}, other.id: {}})
+
+    def test_preference_bulk_set(self):
+        """Test the preference matrix is upserted in one pass"""
+        NotificationPreference.objects.create(
+            user=self.user,
+            notification_type='task_due',
+            delivery_method='email',
+            immediate=True
+        )
+
+        NotificationPreference.bulk_set(self.user, [
+            {'notification_type': 'task_due', 'delivery_method': 'email', 'immediate': False},
+            {'notification_type': 'task_due', 'delivery_method': 'in_app'},
+        ])
+
+        preferences = NotificationPreference.objects.filter(user=self.user, notification_type='task_due')
+        self.assertEqual(preferences.count(), 2)
+        self.assertFalse(preferences.get(delivery_method='email').immediate)
+        self.assertEqual(len(NotificationPreference.for_type(self.user.id, 'task_due')), 2)
+
+    @override_settings(CACHES={
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'template-cache-test',
+        }
+    })
+    def test_template_lookup_cache(self):
+        """Test template lookups are cached, including misses, and invalidated on save"""
+        with self.assertNumQueries(1):
+            self.assertIsNone(NotificationTemplate.for_type('review_request'))
+            self.assertIsNone(NotificationTemplate.for_type('review_request'))
+
+        template = NotificationTemplate.objects.create(
+            notification_type='review_request',
+            title_template='Review: {section}',
+            message_template='Please review {section}'
+        )
+        self.assertEqual(NotificationTemplate.for_type('review_request'), template)
+
     def test_notification_template_rendering(self):
         """Test notification template rendering"""
         template = NotificationTemplate.objects.create(
@@ -244,6 +504,7 @@ class NotificationModelTests(TestCase):
             name='Test Alert Rule',
             trigger_type='task_overdue',
             notification_type='task_overdue',
+            conditions={},
             priority='high',
             message_template='Alert: {message}',
             max_frequency_hours=24,
@@ -258,12 +519,33 @@ class NotificationModelTests(TestCase):
         
         # Should not be able to trigger again immediately
         self.assertFalse(rule.can_trigger())
+        self.assertEqual(rule.trigger_count, 1)
         
         # Should be able to trigger after frequency period
         rule.last_triggered = timezone.now() - timezone.timedelta(hours=25)
         rule.save()
         self.assertTrue(rule.can_trigger())
 
+    def test_alert_rule_ready_queryset(self):
+        """Test SQL-side frequency filtering of alert rules"""
+        rule_kwargs = {
+            'trigger_type': 'task_overdue',
+            'notification_type': 'task_overdue',
+            'conditions': {},
+            'message_template': 'Alert',
+            'max_frequency_hours': 24,
+        }
+        never = AlertRule.objects.create(name='Never triggered', **rule_kwargs)
+        elapsed = AlertRule.objects.create(
+            name='Window elapsed',
+            last_triggered=timezone.now() - timezone.timedelta(hours=25),
+            **rule_kwargs
+        )
+        AlertRule.objects.create(name='Recently triggered', last_triggered=timezone.now(), **rule_kwargs)
+        AlertRule.objects.create(name='Inactive', is_active=False, **rule_kwargs)
+
+        self.assertEqual(set(AlertRule.objects.ready()), {never, elapsed})
+
     def test_webhook_endpoint_success_rate(self):
         """Test webhook endpoint success rate calculation"""
         endpoint = WebhookEndpoint.objects.create(
@@ -276,21 +558,74 @@ class NotificationModelTests(TestCase):
         
         self.assertEqual(endpoint.success_rate, 80.0)
         
+        endpoint.record_delivery(success=True)
+        endpoint.record_delivery(success=False)
+        endpoint.refresh_from_db()
+        self.assertEqual((endpoint.success_count, endpoint.failure_count), (81, 21))
+        self.assertIsNotNone(endpoint.last_sent)
+        
+        annotated = WebhookEndpoint.objects.with_success_rate().get(pk=endpoint.pk)
+        self.assertAlmostEqual(annotated.success_rate_db, 81 / 102 * 100)
+        self.assertEqual(annotated.success_rate, annotated.success_rate_db)
+        
         # Test with no attempts
         endpoint.success_count = 0
         endpoint.failure_count = 0
         self.assertEqual(endpoint.success_rate, 0)
 
+    @patch('apps.notifications.models._webhook_session')
+    def test_webhook_dispatch_batch(self, mock_session):
+        """Test batched webhook sends update counters once per endpoint"""
+        mock_session.return_value.post.side_effect = [
+            MagicMock(ok=True), MagicMock(ok=True), MagicMock(ok=False)
+        ]
+        endpoint = WebhookEndpoint.objects.create(
+            name='Test Webhook',
+            service_type='slack',
+            webhook_url='https://hooks.slack.com/test'
+        )
+
+        with self.assertNumQueries(1):
+            results = WebhookEndpoint.dispatch_batch([(endpoint, {'n': i}) for i in range(3)])
+
+        self.assertEqual(sorted(results), [False, True, True])
+        endpoint.refresh_from_db()
+        self.assertEqual((endpoint.success_count, endpoint.failure_count), (2, 1))
+
+    def test_webhook_payload_template(self):
+        """Test JSON payload templates render from the notification"""
+        endpoint = WebhookEndpoint(
+            name='Test Webhook',
+            service_type='slack',
+            webhook_url='https://hooks.slack.com/test',
+            payload_template='{"text": "[{priority}] {title}", "score": "{score}", "tags": ["bc"]}'
+        )
+        notification = Notification(
+            user=self.user,
+            notification_type='task_due',
+            title='Task Due',
+            message='Soon',
+            priority='high',
+            metadata={'score': 7}
+        )
+
+        self.assertEqual(endpoint.build_payload(notification), {
+            'text': '[high] Task Due', 'score': 7, 'tags': ['bc']
+        })
+
 
 class NotificationViewTests(TestCase):
-    def setUp(self):
-        self.user = User.objects.create_user(
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
             username='testuser',
             email='test@blackcoral.ai',
             first_name='Test',
             last_name='User',
             password='testpass123'
         )
+
+    def setUp(self):
         self.client.force_login(self.user)
 
     def test_notification_center_view(self):
@@ -332,6 +667,129 @@ class NotificationViewTests(TestCase):
         notification.refresh_from_db()
         self.assertTrue(notification.is_read)
 
+    def test_notification_preferences_update(self):
+        """Test the preference form upserts submitted settings and keeps the rest"""
+        NotificationPreference.objects.create(
+            user=self.user, notification_type='mention', delivery_method='email', daily_digest=True
+        )
+
+        response = self.client.post('/notifications/preferences/', {
+            'pref_mention_email_immediate': 'false',
+            'pref_deadline_slack_enabled': 'false',
+        }, HTTP_HX_REQUEST='true')
+
+        self.assertEqual(response.status_code, 200)
+        existing = NotificationPreference.objects.get(user=self.user, notification_type='mention')
+        self.assertEqual((existing.is_enabled, existing.immediate, existing.daily_digest), (True, False, True))
+        created = NotificationPreference.objects.get(user=self.user, notification_type='deadline')
+        self.assertEqual((created.delivery_method, created.is_enabled), ('slack', False))
+
+    def test_webhook_notification_fans_out(self):
+        """Test the webhook endpoint queues the payload and the task notifies every listed user"""
+        other = User.objects.create_user(username='other', email='other@blackcoral.ai')
+        payload = {
+            'user_emails': [self.user.email, other.email, 'missing@blackcoral.ai'],
+            'title': 'Outage',
+            'message': 'Scheduled maintenance',
+        }
+
+        with patch('apps.notifications.tasks.process_webhook_notification.delay') as mock_delay:
+            mock_delay.return_value.id = 'task-1'
+            response = self.client.post(
+                '/notifications/api/webhook/', json.dumps(payload), content_type='application/json'
+            )
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json(), {'accepted': True, 'task_id': 'task-1'})
+        mock_delay.assert_called_once_with(payload)
+        self.assertFalse(Notification.objects.filter(title='Outage').exists())
+
+        result = process_webhook_notification(payload)
+
+        self.assertEqual(len(result['notification_ids']), 2)
+        self.assertEqual(result['missing_emails'], ['missing@blackcoral.ai'])
+        self.assertEqual(
+            set(Notification.objects.filter(title='Outage').values_list('user_id', flat=True)),
+            {self.user.pk, other.pk}
+        )
+
+    def test_webhook_notification_rejects_malformed_recipients(self):
+        """Test malformed recipients get a 400 and are never queued or retried"""
+        with patch('apps.notifications.tasks.process_webhook_notification.delay') as mock_delay:
+            for payload in ({'user_emails': self.user.email}, {'user_emails': [1]}, {'title': 'No recipients'}):
+                response = self.client.post(
+                    '/notifications/api/webhook/', json.dumps(payload), content_type='application/json'
+                )
+                self.assertEqual(response.status_code, 400)
+        mock_delay.assert_not_called()
+
+        result = process_webhook_notification({'title': 'No recipients'})
+
+        self.assertEqual(result['status'], 'error')
+        self.assertFalse(Notification.objects.filter(title='No recipients').exists())
+
+    def test_notification_list_pages_without_count(self):
+        """Test the HTMX list pages by offset and detects a next page from one extra row"""
+        Notification.objects.bulk_create([
+            Notification(user=self.user, notification_type='system_update', title=f'N{i}', message='m')
+            for i in range(12)
+        ])
+
+        first = self.client.get('/notifications/htmx/list/')
+        second = self.client.get('/notifications/htmx/list/?page=2')
+
+        self.assertEqual(len(first.context['notifications']), 10)
+        self.assertTrue(first.context['page']['has_next'])
+        self.assertEqual(len(second.context['notifications']), 2)
+        self.assertFalse(second.context['page']['has_next'])
+        self.assertContains(second, '?page=1')
+
+    def test_notification_poll_returns_unread_only(self):
+        """Test polling returns sent notifications and skips the query when nothing is unread"""
+        response = self.client.get('/notifications/htmx/poll/')
+        self.assertEqual(response.json()['count'], 0)
+
+        Notification.objects.create(
+            user=self.user, notification_type='system_update', title='Fresh', message='m', status='sent'
+        )
+
+        response = self.client.get('/notifications/htmx/poll/')
+        self.assertEqual([n['title'] for n in response.json()['notifications']], ['Fresh'])
+
+        response = self.client.get('/notifications/htmx/poll/', {'last_check': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_dismiss_notification_view(self):
+        """Test dismissing only affects the requesting user's notification"""
+        notification = Notification.objects.create(
+            user=self.user, notification_type='system_update', title='Dismiss me', message='m', status='sent'
+        )
+        other = User.objects.create_user(username='other')
+        foreign = Notification.objects.create(user=other, notification_type='system_update', title='Not yours', message='m')
+
+        response = self.client.post(f'/notifications/dismiss/{notification.id}/')
+        missing = self.client.post(f'/notifications/dismiss/{foreign.id}/')
+
+        self.assertEqual(response.json(), {'success': True})
+        self.assertEqual(missing.status_code, 404)
+        notification.refresh_from_db()
+        self.assertEqual(notification.status, 'dismissed')
+        self.assertEqual(notification_service.get_unread_count(self.user), 0)
+
+    def test_count_badge_conditional_get(self):
+        """Test the badge answers 304 until the unread count changes"""
+        first = self.client.get('/notifications/htmx/badge/')
+        unchanged = self.client.get('/notifications/htmx/badge/', HTTP_IF_NONE_MATCH=first['ETag'])
+
+        Notification.objects.create(
+            user=self.user, notification_type='system_update', title='New', message='m', status='sent'
+        )
+        changed = self.client.get('/notifications/htmx/badge/', HTTP_IF_NONE_MATCH=first['ETag'])
+
+        self.assertEqual(unchanged.status_code, 304)
+        self.assertEqual(changed.status_code, 200)
+        self.assertContains(changed, '1')
+
     def test_notification_stats_api(self):
         """Test notification statistics API"""
         # Create some notifications
@@ -349,15 +807,85 @@ class NotificationViewTests(TestCase):
         data = response.json()
         
         self.assertIn('total_unread', data)
-        self.assertIn('today', data)
-        self.assertIn('by_type', data)
+        self.assertEqual(data['today'], 5)
+        self.assertEqual(data['this_month'], 5)
+        self.assertEqual(data['by_type'], {'system_update': 5})
+
+
+class ArchiveNotificationsCommandTests(TestCase):
+    """Test the archive_notifications management command"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='testuser',
+            email='test@blackcoral.ai',
+            password='testpass123'
+        )
+
+    def setUp(self):
+        now = timezone.now()
+        self.old = Notification.objects.create(
+            user=self.user, notification_type='system_update', title='Old', message='m',
+            metadata={'k': True, 'x': None}, created_at=now - timezone.timedelta(days=500)
+        )
+        self.recent = Notification.objects.create(
+            user=self.user, notification_type='system_update', title='Recent', message='m',
+            created_at=now - timezone.timedelta(days=30)
+        )
+        self.output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output_dir)
+
+    def _archives(self):
+        return sorted(name for name in os.listdir(self.output_dir) if name.endswith('.csv.gz'))
+
+    def test_dry_run_leaves_rows(self):
+        """Test --dry-run reports the old month without writing or deleting"""
+        out = StringIO()
+        call_command('archive_notifications', dry_run=True, output_dir=self.output_dir, stdout=out)
+
+        self.assertIn('Would archive 1 notifications', out.getvalue())
+        self.assertEqual(Notification.objects.count(), 2)
+        self.assertEqual(self._archives(), [])
+
+    def test_archives_old_months_and_keeps_retention_window(self):
+        """Test old months are written and removed while recent rows survive"""
+        call_command('archive_notifications', output_dir=self.output_dir, stdout=StringIO())
+
+        self.assertEqual(list(Notification.objects.all()), [self.recent])
+        self.assertEqual(self._archives(), [f'notif_{self.old.created_at:%Y_%m}.csv.gz'])
+
+    def test_archive_round_trips_metadata(self):
+        """Test metadata is archived as JSON and datetimes as ISO 8601"""
+        call_command('archive_notifications', output_dir=self.output_dir, stdout=StringIO())
+
+        with gzip.open(os.path.join(self.output_dir, self._archives()[0]), 'rt', newline='') as archive:
+            rows = list(csv.DictReader(archive))
+
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(json.loads(rows[0]['metadata']), {'k': True, 'x': None})
+        self.assertEqual(rows[0]['created_at'], self.old.created_at.isoformat())
+
+    def test_rerun_never_overwrites_existing_archive(self):
+        """Test a month archived again is written beside the earlier file"""
+        label = f'notif_{self.old.created_at:%Y_%m}'
+        existing = os.path.join(self.output_dir, f'{label}.csv.gz')
+        with gzip.open(existing, 'wt') as archive:
+            archive.write('earlier run\n')
+
+        call_command('archive_notifications', output_dir=self.output_dir, stdout=StringIO())
+
+        self.assertEqual(self._archives(), [f'{label}.csv.gz', f'{label}_1.csv.gz'])
+        with gzip.open(existing, 'rt') as archive:
+            self.assertEqual(archive.read(), 'earlier run\n')
 
 
 class NotificationSignalTests(TestCase):
     """Test notification signals and automatic triggers"""
     
-    def setUp(self):
-        self.user = User.objects.create_user(
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
             username='testuser',
             email='test@blackcoral.ai',
             first_name='Test',
@@ -365,7 +893,7 @@ class NotificationSignalTests(TestCase):
             password='testpass123'
         )
 
-    @patch('apps.notifications.signals.notification_service.create_notification')
+    @patch('apps.notifications.signals.notification_service.queue_notification')
     def test_team_creation_signal(self, mock_create_notification):
         """Test that team creation triggers notification"""
         from apps.collaboration.models import ProposalTeam
@@ -395,12 +923,60 @@ class NotificationSignalTests(TestCase):
         self.assertIn('lead', call_args[1]['title'])
 
 
+    @patch('apps.notifications.signals.notification_service.queue_notification')
+    def test_task_status_signal_diffs_against_refreshed_values(self, mock_queue_notification):
+        """Test a task completed elsewhere and then refreshed is not reported as completed again"""
+        from apps.collaboration.models import ProposalTeam, TaskItem
+        from apps.opportunities.models import Opportunity
+        
+        lead = User.objects.create_user(username='lead', email='lead@blackcoral.ai')
+        opportunity = Opportunity.objects.create(solicitation_number='TEST-002', title='Test Opportunity')
+        team = ProposalTeam.objects.create(opportunity=opportunity, name='Test Team', lead=lead)
+        task = TaskItem.objects.create(team=team, title='Draft', assigned_to=self.user)
+        TaskItem.objects.filter(pk=task.pk).update(status='completed')
+        mock_queue_notification.reset_mock()
+        
+        task.refresh_from_db()
+        task.notes = 'Reviewed'
+        task.save()
+        
+        titles = [call.kwargs['title'] for call in mock_queue_notification.call_args_list]
+        self.assertNotIn('Task completed: Draft', titles)
+
+    def test_comment_view_notifies_mentions_and_task_assignee(self):
+        """Test a comment posted through the view reaches mentioned users and the task assignee"""
+        from apps.collaboration.models import ProposalTeam, TaskItem, TeamMembership
+        from apps.opportunities.models import Opportunity
+        
+        mentioned = User.objects.create_user(username='mentioned', email='mentioned@blackcoral.ai')
+        assignee = User.objects.create_user(username='assignee', email='assignee@blackcoral.ai')
+        opportunity = Opportunity.objects.create(solicitation_number='TEST-003', title='Test Opportunity')
+        team = ProposalTeam.objects.create(opportunity=opportunity, name='Test Team', lead=self.user)
+        for member in (self.user, mentioned, assignee):
+            TeamMembership.objects.create(team=team, user=member, role='technical_lead')
+        task = TaskItem.objects.create(team=team, title='Draft', assigned_to=assignee)
+        Notification.objects.all().delete()
+        self.client.force_login(self.user)
+        
+        with patch.object(create_queued_notifications, 'delay', side_effect=create_queued_notifications), \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'/teams/{team.id}/comments/create/', {
+                'content': 'Please check this',
+                'task': task.id,
+                'mentioned_users': [mentioned.id],
+            }, HTTP_HX_REQUEST='true')
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(Notification.objects.filter(user=mentioned, notification_type='comment_mention').exists())
+        self.assertTrue(Notification.objects.filter(user=assignee, title='Comment on your task: Draft').exists())
+
 # Integration test with real database
 class NotificationIntegrationTests(TestCase):
     """Integration tests for the complete notification system"""
     
-    def setUp(self):
-        self.user = User.objects.create_user(
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
             username='testuser',
             email='test@blackcoral.ai',
             first_name='Test',
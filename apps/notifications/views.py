@@ -7,15 +7,26 @@ import json
 from django.shortcuts import render, get_object_or_404
 from django.http import JsonResponse, HttpResponse
 from django.contrib.auth.decorators import login_required
-from django.views.decorators.http import require_http_methods
+from django.views.decorators.http import etag, require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 from django.utils import timezone
-from django.core.paginator import Paginator
-from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.db.models import Count, F, Q
 
 from .models import Notification, NotificationPreference, NotificationDigest
 from .services import notification_service
 
+NOTIFICATION_PAGE_SIZE = 10
+
+# Form setting suffix -> NotificationPreference field
+PREFERENCE_SETTING_FIELDS = {
+    'enabled': 'is_enabled',
+    'immediate': 'immediate',
+    'daily_digest': 'daily_digest',
+    'weekly_digest': 'weekly_digest',
+}
+PREFERENCE_FIELDS = [field for field in NotificationPreference.UPSERT_FIELDS if field != 'updated_at']
+
 
 @login_required
 def notification_center(request):
@@ -42,20 +53,23 @@ def notification_list_htmx(request):
     notification_type = request.GET.get('type', None)
     unread_only = request.GET.get('unread', 'false').lower() == 'true'
     
-    # Get notifications with filtering
+    # Fetch one row past the page instead of counting the whole list to know if there is a next page
+    page = max(page, 1)
     notifications = notification_service.get_user_notifications(
         user=request.user,
         unread_only=unread_only,
         notification_type=notification_type,
-        limit=100  # Get more for pagination
+        limit=NOTIFICATION_PAGE_SIZE + 1,
+        offset=(page - 1) * NOTIFICATION_PAGE_SIZE
     )
     
-    # Paginate results
-    paginator = Paginator(notifications, 10)
-    page_obj = paginator.get_page(page)
-    
     context = {
-        'notifications': page_obj,
+        'notifications': notifications[:NOTIFICATION_PAGE_SIZE],
+        'page': {
+            'number': page,
+            'has_previous': page > 1,
+            'has_next': len(notifications) > NOTIFICATION_PAGE_SIZE,
+        },
         'unread_count': notification_service.get_unread_count(request.user),
     }
     
@@ -72,7 +86,7 @@ def mark_notification_read(request, notification_id):
         if success:
             # Return updated notification item
             try:
-                notification = Notification.objects.get(id=notification_id, user=request.user)
+                notification = Notification.objects.for_user(request.user).with_body().get(id=notification_id)
                 context = {'notification': notification}
                 return render(request, 'notifications/partials/notification_item.html', context)
             except Notification.DoesNotExist:
@@ -101,19 +115,22 @@ def mark_all_read(request):
 @require_http_methods(['POST'])
 def dismiss_notification(request, notification_id):
     """Dismiss a notification"""
-    try:
-        notification = Notification.objects.get(id=notification_id, user=request.user)
-        notification.mark_as_dismissed()
-        
-        if request.headers.get('HX-Request'):
-            return HttpResponse('')  # Empty response removes the element
-        
-        return JsonResponse({'success': True})
-    except Notification.DoesNotExist:
+    if not notification_service.dismiss_notification(notification_id, request.user):
         return JsonResponse({'success': False}, status=404)
+    
+    if request.headers.get('HX-Request'):
+        return HttpResponse('')  # Empty response removes the element
+    
+    return JsonResponse({'success': True})
+
+
+def _badge_etag(request):
+    """The badge renders nothing but the unread count, so the cached count identifies its content"""
+    return f'badge-{request.user.pk}-{notification_service.get_unread_count(request.user)}'
 
 
 @login_required
+@etag(_badge_etag)
 def notification_count_badge(request):
     """HTMX endpoint for notification count badge"""
     unread_count = notification_service.get_unread_count(request.user)
@@ -147,35 +164,34 @@ def notification_dropdown(request):
 def notification_preferences(request):
     """View and update notification preferences"""
     if request.method == 'POST':
-        # Update preferences
+        # Collect every submitted setting per preference, then write them in one upsert
+        updates = {}
         for key, value in request.POST.items():
             if key.startswith('pref_'):
                 # Parse preference key: pref_notification_type_delivery_method_setting
                 parts = key.split('_')
                 if len(parts) >= 4:
-                    notification_type = parts[1]
-                    delivery_method = parts[2]
-                    setting = '_'.join(parts[3:])
-                    
-                    # Get or create preference
-                    pref, created = NotificationPreference.objects.get_or_create(
-                        user=request.user,
-                        notification_type=notification_type,
-                        delivery_method=delivery_method,
-                        defaults={'is_enabled': True}
-                    )
-                    
-                    # Update setting
-                    if setting == 'enabled':
-                        pref.is_enabled = value.lower() == 'true'
-                    elif setting == 'immediate':
-                        pref.immediate = value.lower() == 'true'
-                    elif setting == 'daily_digest':
-                        pref.daily_digest = value.lower() == 'true'
-                    elif setting == 'weekly_digest':
-                        pref.weekly_digest = value.lower() == 'true'
-                    
-                    pref.save()
+                    changes = updates.setdefault((parts[1], parts[2]), {})
+                    field = PREFERENCE_SETTING_FIELDS.get('_'.join(parts[3:]))
+                    if field:
+                        changes[field] = value.lower() == 'true'
+        
+        if updates:
+            current = {
+                (pref.notification_type, pref.delivery_method): pref
+                for pref in NotificationPreference.objects.filter(user=request.user)
+            }
+            rows = []
+            for (notification_type, delivery_method), changes in updates.items():
+                # Unsubmitted fields keep their stored (or default) values
+                pref = current.get((notification_type, delivery_method)) or NotificationPreference()
+                rows.append({
+                    'notification_type': notification_type,
+                    'delivery_method': delivery_method,
+                    **{field: getattr(pref, field) for field in PREFERENCE_FIELDS},
+                    **changes,
+                })
+            NotificationPreference.bulk_set(request.user, rows)
         
         if request.headers.get('HX-Request'):
             return HttpResponse('Preferences updated successfully!')
@@ -235,7 +251,7 @@ def notification_search(request):
     query = request.GET.get('q', '')
     notification_type = request.GET.get('type', '')
     
-    notifications = Notification.objects.filter(user=request.user)
+    notifications = Notification.objects.for_user(request.user)
     
     if query:
         notifications = notifications.filter(
@@ -246,7 +262,7 @@ def notification_search(request):
     if notification_type:
         notifications = notifications.filter(notification_type=notification_type)
     
-    notifications = notifications.order_by('-created_at')[:50]
+    notifications = notifications.with_body().recent(50)
     
     if request.headers.get('HX-Request'):
         context = {'notifications': notifications}
@@ -274,38 +290,18 @@ def webhook_notification(request):
         # Validate webhook signature if provided
         # TODO: Implement webhook signature validation
         
-        # Extract notification data
-        user_email = data.get('user_email')
-        notification_type = data.get('type', 'system_update')
-        title = data.get('title', 'External Notification')
-        message = data.get('message', '')
-        priority = data.get('priority', 'medium')
+        # Validate recipients before accepting; the worker only looks users up
+        from .tasks import process_webhook_notification, webhook_recipients
+        try:
+            webhook_recipients(data)
+        except ValueError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        
+        # Accept and queue: user lookup and notification creation run on a worker
+        task = process_webhook_notification.delay(data)
         
-        if not user_email:
-            return JsonResponse({'error': 'user_email required'}, status=400)
+        return JsonResponse({'accepted': True, 'task_id': task.id}, status=202)
         
-        try:
-            from django.contrib.auth import get_user_model
-            User = get_user_model()
-            user = User.objects.get(email=user_email)
-            
-            notification = notification_service.create_notification(
-                user=user,
-                notification_type=notification_type,
-                title=title,
-                message=message,
-                priority=priority,
-                metadata=data.get('metadata', {})
-            )
-            
-            return JsonResponse({
-                'success': True,
-                'notification_id': notification.id
-            })
-            
-        except User.DoesNotExist:
-            return JsonResponse({'error': 'User not found'}, status=404)
-            
     except json.JSONDecodeError:
         return JsonResponse({'error': 'Invalid JSON'}, status=400)
     except Exception as e:
@@ -315,38 +311,26 @@ def webhook_notification(request):
 @login_required
 def notification_stats(request):
     """Get notification statistics for dashboard"""
-    today = timezone.now().date()
+    # Compare created_at against local-midnight bounds so the (user, created_at) index applies
+    today = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
     week_ago = today - timezone.timedelta(days=7)
     month_ago = today - timezone.timedelta(days=30)
     
+    # One pass over the last month yields every window count; by_type is a single GROUP BY on the same rows
+    recent = Notification.objects.for_user(request.user).filter(created_at__gte=month_ago)
+    counts = recent.aggregate(
+        today=Count('id', filter=Q(created_at__gte=today)),
+        this_week=Count('id', filter=Q(created_at__gte=week_ago)),
+        this_month=Count('id'),
+    )
+    type_counts = recent.values('notification_type').annotate(count=Count('id')).order_by('-count')
+    
     stats = {
         'total_unread': notification_service.get_unread_count(request.user),
-        'today': Notification.objects.filter(
-            user=request.user,
-            created_at__date=today
-        ).count(),
-        'this_week': Notification.objects.filter(
-            user=request.user,
-            created_at__date__gte=week_ago
-        ).count(),
-        'this_month': Notification.objects.filter(
-            user=request.user,
-            created_at__date__gte=month_ago
-        ).count(),
-        'by_type': {}
+        **counts,
+        'by_type': {item['notification_type']: item['count'] for item in type_counts},
     }
     
-    # Get counts by notification type
-    type_counts = Notification.objects.filter(
-        user=request.user,
-        created_at__date__gte=month_ago
-    ).values('notification_type').annotate(
-        count=models.Count('id')
-    ).order_by('-count')
-    
-    for item in type_counts:
-        stats['by_type'][item['notification_type']] = item['count']
-    
     return JsonResponse(stats)
 
 
@@ -356,39 +340,34 @@ def notification_poll(request):
     """Polling endpoint for real-time notifications"""
     last_check = request.GET.get('last_check')
     
-    queryset = Notification.objects.filter(
-        user=request.user,
-        status='sent'
-    )
+    queryset = Notification.objects.for_user(request.user).unread()
     
     if last_check:
         try:
-            from django.utils.dateparse import parse_datetime
             last_check_time = parse_datetime(last_check)
-            if last_check_time:
-                queryset = queryset.filter(created_at__gt=last_check_time)
-        except:
-            pass
+        except ValueError:
+            last_check_time = None
+        if last_check_time is None:
+            return JsonResponse({'error': 'Invalid last_check'}, status=400)
+        queryset = queryset.filter(created_at__gt=last_check_time)
     
-    new_notifications = list(queryset.order_by('-created_at')[:10])
+    # Sent notifications are exactly the unread ones, so the cached count lets idle polls skip the query
+    if not notification_service.get_unread_count(request.user):
+        queryset = queryset.none()
     
     if request.headers.get('HX-Request'):
-        context = {'notifications': new_notifications}
+        context = {'notifications': list(queryset.with_body().recent(10))}
         return render(request, 'notifications/partials/new_notifications.html', context)
     
+    # The JSON feed only needs column values, so skip building model instances
+    new_notifications = list(queryset.values(
+        'id', 'title', 'message', 'priority', 'action_url', 'action_label',
+        type=F('notification_type'), created=F('created_at')
+    ).recent(10))
+    for row in new_notifications:
+        row['created_at'] = row.pop('created').isoformat()
+    
     return JsonResponse({
-        'notifications': [
-            {
-                'id': n.id,
-                'title': n.title,
-                'message': n.message,
-                'type': n.notification_type,
-                'priority': n.priority,
-                'created_at': n.created_at.isoformat(),
-                'action_url': n.action_url,
-                'action_label': n.action_label,
-            }
-            for n in new_notifications
-        ],
+        'notifications': new_notifications,
         'count': len(new_notifications)
-    })
\ No newline at end of file
+    })
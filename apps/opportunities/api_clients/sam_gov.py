@@ -7,9 +7,11 @@ import logging
 import requests
 import time
 import random
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 from urllib.parse import urlencode, urlparse
+from requests.adapters import HTTPAdapter
 from django.conf import settings
 from django.core.cache import cache
 from django.utils import timezone
@@ -19,6 +21,7 @@ from apps.ai_integration.ai_providers import AIProvider
 from django.core.mail import EmailMessage
 from django.template.loader import render_to_string
 from apps.authentication.models import User
+from ..models import Opportunity
 import json
 import hashlib
 from datetime import date
@@ -58,6 +61,9 @@ class SAMGovClient:
         'federal_system': 10000
     }
     
+    # Posted-date windows (days back) tried in turn when looking up a single notice
+    NOTICE_SEARCH_WINDOWS = (30, 90, 365)
+    
     def __init__(self, api_key: str = None, use_alpha: bool = False, use_v3: bool = None):
         """
         Initialize SAM.gov API client with API key rotation support.
@@ -91,6 +97,14 @@ class SAMGovClient:
         else:
             self.base_url = self.BASE_URL_V3 if use_v3 else self.BASE_URL
             
+        # One pooled session so paged searches and description fetches reuse keep-alive connections
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=10))
+        self.session.headers.update({
+            'User-Agent': 'BLACK CORAL Government Contracting System',
+            'Accept': 'application/json'
+        })
+            
         self.account_type = getattr(settings, 'SAM_GOV_ACCOUNT_TYPE', 'non_federal')
         self.daily_limit = self.RATE_LIMITS.get(self.account_type, 10)
         
@@ -166,10 +180,15 @@ class SAMGovClient:
         cache.set(cache_key, True, 3600)  # Cache for 1 hour
     
     def _get_cache_key(self, params: Dict[str, Any]) -> str:
-        """Generate cache key for request parameters."""
-        sorted_params = sorted(params.items())
-        param_str = urlencode(sorted_params)
-        return f"sam_gov:{param_str}"
+        """Generate a fixed-length cache key from the request parameters, excluding the API key."""
+        public_params = {key: value for key, value in params.items() if key != 'api_key'}
+        param_str = json.dumps(public_params, sort_keys=True, default=str)
+        return f"sam_gov:{hashlib.blake2b(param_str.encode(), digest_size=16).hexdigest()}"
+    
+    def _rate_limit_key(self) -> str:
+        """Cache key of today's request counter for the current API key."""
+        today = timezone.now().date()
+        return f"sam_gov_requests:{today}:{self.api_key}"
     
     def _check_rate_limit(self) -> bool:
         """
@@ -178,10 +197,7 @@ class SAMGovClient:
         Returns:
             True if within limits, False if exceeded
         """
-        today = timezone.now().date()
-        cache_key = f"sam_gov_requests:{today}:{self.api_key}"
-        
-        request_count = cache.get(cache_key, 0)
+        request_count = cache.get(self._rate_limit_key(), 0)
         if request_count >= self.daily_limit:
             logger.warning(f"SAM.gov rate limit exceeded: {request_count}/{self.daily_limit}")
             return False
@@ -189,12 +205,14 @@ class SAMGovClient:
         return True
     
     def _increment_rate_limit(self):
-        """Increment the daily request counter."""
-        today = timezone.now().date()
-        cache_key = f"sam_gov_requests:{today}:{self.api_key}"
-        
-        request_count = cache.get(cache_key, 0)
-        cache.set(cache_key, request_count + 1, 86400)  # Expire after 24 hours
+        """Atomically increment the daily request counter (a single INCR once it exists)."""
+        cache_key = self._rate_limit_key()
+        try:
+            cache.incr(cache_key)
+        except ValueError:
+            # First request today: create the counter, or count against one a concurrent request just created
+            if not cache.add(cache_key, 1, 86400):  # Expire after 24 hours
+                cache.incr(cache_key)
     
     def _make_request(self, params: Dict[str, Any], max_retries: int = 4) -> Dict[str, Any]:
         """
@@ -230,14 +248,10 @@ class SAMGovClient:
                 logger.info(f"Request timeout: 30 seconds")
                 logger.info(f"Request headers: User-Agent: 'BLACK CORAL Government Contracting System', Accept: 'application/json'")
                 
-                response = requests.get(
+                response = self.session.get(
                     self.base_url,
                     params=params,
-                    timeout=30,
-                    headers={
-                        'User-Agent': 'BLACK CORAL Government Contracting System',
-                        'Accept': 'application/json'
-                    }
+                    timeout=30
                 )
                 
                 # DEBUG: Log response details
@@ -679,13 +693,82 @@ class SAMGovClient:
         
         return result
     
-    def get_opportunity_details(self, notice_id: str, fetch_enhanced_description: bool = True) -> Dict[str, Any]:
+    def search_all_opportunities(self, page_size: int = 100, max_workers: int = 4, **search_params) -> List[Dict[str, Any]]:
+        """
+        Fetch every page of a search, requesting the pages after the first concurrently.
+        
+        The first page reports totalRecords, so the remaining offsets are known up front and
+        are fetched by a small thread pool one batch of max_workers pages at a time, never
+        more pages than today's remaining quota. Stops after the batch in which a page hits
+        the rate limit, so no further requests are spent on pages that would be discarded.
+        When totalRecords is missing, pages are fetched one by one until a short page.
+        
+        Args:
+            page_size: Records requested per page
+            max_workers: Maximum number of pages fetched at once
+            **search_params: Filters passed through to search_opportunities
+            
+        Returns:
+            Opportunities from every fetched page, in offset order
+        """
+        def fetch_page(offset):
+            try:
+                return self.search_opportunities(limit=page_size, offset=offset, **search_params)
+            except SAMGovAPIError as e:
+                if "rate limit" in str(e).lower():
+                    logger.warning(f"Rate limit reached at offset {offset}, stopping pagination")
+                    return None
+                raise
+        
+        first_page = fetch_page(0)
+        if first_page is None:
+            return []
+        opportunities = list(first_page.get('opportunities', []))
+        if len(opportunities) < page_size:
+            return opportunities
+        
+        total_records = first_page.get('api_total_records')
+        remaining_quota = max(self.daily_limit - cache.get(self._rate_limit_key(), 0), 0)
+        
+        if not total_records:
+            # No total to plan offsets from, so page sequentially until a short page
+            offset = page_size
+            for _ in range(remaining_quota):
+                page = fetch_page(offset)
+                if page is None:
+                    break
+                page_opportunities = page.get('opportunities', [])
+                opportunities.extend(page_opportunities)
+                if len(page_opportunities) < page_size:
+                    break
+                offset += page_size
+            return opportunities
+        
+        offsets = range(page_size, total_records, page_size)[:remaining_quota]
+        batch_size = max(1, min(max_workers, len(offsets)))
+        
+        with ThreadPoolExecutor(max_workers=batch_size) as executor:
+            for start in range(0, len(offsets), batch_size):
+                pages = list(executor.map(fetch_page, offsets[start:start + batch_size]))
+                for page in pages:
+                    if page is None:
+                        return opportunities
+                    opportunities.extend(page.get('opportunities', []))
+        
+        return opportunities
+    
+    def get_opportunity_details(self, notice_id: str, fetch_enhanced_description: bool = True,
+                                use_local: bool = True) -> Dict[str, Any]:
         """
         Get detailed information about a specific opportunity.
         
+        Looks in the cache, then in stored opportunities, and only then searches
+        SAM.gov over widening posted-date windows.
+        
         Args:
             notice_id: Opportunity notice ID
             fetch_enhanced_description: Whether to fetch enhanced description content
+            use_local: Whether a stored opportunity may answer instead of SAM.gov
             
         Returns:
             Opportunity details with enhanced description if requested
@@ -695,58 +778,20 @@ class SAMGovClient:
         if cached_data:
             return cached_data
         
-        # Search for the specific notice using notice ID parameter
-        # Use a 6-month date range to find the opportunity
-        posted_from = datetime.now() - timedelta(days=180)  # 6 months back
-        posted_to = datetime.now()  # Today
-        
-        params = {
-            'limit': '100',  # Increase limit in case there are multiple matches
-            'noticeid': notice_id,  # Use notice ID parameter
-            'postedFrom': posted_from.strftime('%m/%d/%Y'),
-            'postedTo': posted_to.strftime('%m/%d/%Y')
-        }
-        
-        # Use the same fallback logic as search_opportunities
-        try:
-            response_data = self._make_request(params)
-        except SAMGovAPIError as e:
-            # If we get a 500 error after retries, try with v2 endpoint
-            if "500" in str(e) or "INTERNAL SERVER ERROR" in str(e):
-                logger.warning(f"Got 500 error for notice {notice_id}, trying v2 endpoint fallback...")
-                
-                # Try v2 endpoint if using v3
-                if self.use_v3:
-                    logger.info(f"Switching from v3 to v2 endpoint for notice {notice_id}")
-                    old_url = self.base_url
-                    self.base_url = self.BASE_URL  # Switch to v2
-                    self.use_v3 = False
-                    try:
-                        response_data = self._make_request(params)
-                        logger.info(f"v2 endpoint successful for notice {notice_id}")
-                    except SAMGovAPIError:
-                        # Restore original settings and re-raise
-                        self.base_url = old_url
-                        self.use_v3 = True
-                        raise
-                else:
-                    raise
-            else:
-                raise
-        opportunities = response_data.get('opportunitiesData', [])
-        
-        # Filter to find exact match
         matching_opportunity = None
-        for opp in opportunities:
-            if opp.get('noticeId') == notice_id:
-                matching_opportunity = opp
-                break
+        if use_local:
+            matching_opportunity = (
+                Opportunity.objects.filter(notice_id=notice_id)
+                .exclude(raw_data={})
+                .values_list('raw_data', flat=True)
+                .first()
+            )
         
         if not matching_opportunity:
-            raise SAMGovAPIError(f"Opportunity {notice_id} not found")
+            matching_opportunity = self._search_notice(notice_id)
         
         # Enhance description if requested
-        if fetch_enhanced_description:
+        if fetch_enhanced_description and 'descriptionEnhanced' not in matching_opportunity:
             try:
                 enhanced_description = self.get_enhanced_opportunity_description(matching_opportunity)
                 if enhanced_description and enhanced_description != matching_opportunity.get('description', ''):
@@ -763,6 +808,58 @@ class SAMGovClient:
         
         return matching_opportunity
     
+    def _search_notice(self, notice_id: str) -> Dict[str, Any]:
+        """
+        Find a notice on SAM.gov, widening the posted-date window only on a miss.
+        
+        Most lookups are for recent notices, so the narrow first window keeps the
+        search cheap and the wider ones are only spent on older notices.
+        """
+        posted_to = datetime.now()
+        
+        for days in self.NOTICE_SEARCH_WINDOWS:
+            posted_from = posted_to - timedelta(days=days)
+            params = {
+                'limit': '100',  # Increase limit in case there are multiple matches
+                'noticeid': notice_id,  # Use notice ID parameter
+                'postedFrom': posted_from.strftime('%m/%d/%Y'),
+                'postedTo': posted_to.strftime('%m/%d/%Y')
+            }
+            
+            # Use the same fallback logic as search_opportunities
+            try:
+                response_data = self._make_request(params)
+            except SAMGovAPIError as e:
+                # If we get a 500 error after retries, try with v2 endpoint
+                if "500" in str(e) or "INTERNAL SERVER ERROR" in str(e):
+                    logger.warning(f"Got 500 error for notice {notice_id}, trying v2 endpoint fallback...")
+                    
+                    # Try v2 endpoint if using v3
+                    if self.use_v3:
+                        logger.info(f"Switching from v3 to v2 endpoint for notice {notice_id}")
+                        old_url = self.base_url
+                        self.base_url = self.BASE_URL  # Switch to v2
+                        self.use_v3 = False
+                        try:
+                            response_data = self._make_request(params)
+                            logger.info(f"v2 endpoint successful for notice {notice_id}")
+                        except SAMGovAPIError:
+                            # Restore original settings and re-raise
+                            self.base_url = old_url
+                            self.use_v3 = True
+                            raise
+                    else:
+                        raise
+                else:
+                    raise
+            
+            # Filter to find exact match
+            for opp in response_data.get('opportunitiesData', []):
+                if opp.get('noticeId') == notice_id:
+                    return opp
+        
+        raise SAMGovAPIError(f"Opportunity {notice_id} not found")
+    
     def get_opportunity_documents(self, opportunity: Dict[str, Any], extract_filenames: bool = True) -> List[Dict[str, str]]:
         """
         Extract document links from an opportunity with optional filename extraction.
@@ -850,7 +947,8 @@ class SAMGovClient:
         Returns:
             Cache key string
         """
-        return f"sam_gov_description:{hash(url)}"
+        # hash() is salted per process, so use a stable digest that every worker agrees on
+        return f"sam_gov_description:{hashlib.blake2b(url.encode(), digest_size=16).hexdigest()}"
     
     def _build_sam_gov_url_with_api_key(self, url: str) -> str:
         """
@@ -1019,7 +1117,7 @@ class SAMGovClient:
                         logger.info(f"Retrying description fetch (attempt {attempt + 1}/{max_retries + 1}) after {sleep_time:.2f}s")
                         time.sleep(sleep_time)
                     
-                    response = requests.get(
+                    response = self.session.get(
                         final_url,
                         headers=headers,
                         timeout=(connect_timeout, read_timeout),
@@ -1183,7 +1281,7 @@ class SAMGovClient:
                         logger.info(f"Retrying description fetch (attempt {attempt + 1}/{max_retries + 1}) after {sleep_time:.2f}s")
                         time.sleep(sleep_time)
                     
-                    response = requests.get(
+                    response = self.session.get(
                         final_url,
                         headers=headers,
                         timeout=(5, 20),  # 5s connect, 20s read as per spec
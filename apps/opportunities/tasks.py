@@ -12,7 +12,7 @@ from django.utils.dateparse import parse_date, parse_datetime
 from django.db import transaction
 
 from .models import Opportunity
-from .api_clients.sam_gov import SAMGovClient, SAMGovAPIError
+from .api_clients.sam_gov import SAMGovClient
 from .api_clients.usaspending_gov import USASpendingClient
 from apps.core.models import NAICSCode, Agency
 from apps.documents.tasks import fetch_opportunity_documents
@@ -246,39 +246,14 @@ def fetch_new_opportunities(self):
         else:
             logger.info("No NAICS codes configured - fetching all opportunities")
         
-        # Fetch in batches to handle pagination
-        all_opportunities = []
-        offset = 0
-        limit = 100
-        
-        while True:
-            try:
-                # Don't pass empty NAICS list to API
-                result = client.search_opportunities(
-                    limit=limit,
-                    offset=offset,
-                    posted_from=posted_from,
-                    posted_to=posted_to,
-                    naics_codes=active_naics if active_naics else None
-                )
-                
-                opportunities = result.get('opportunities', [])
-                if not opportunities:
-                    break
-                
-                all_opportunities.extend(opportunities)
-                
-                # Check if we've fetched all available
-                if len(opportunities) < limit:
-                    break
-                
-                offset += limit
-                
-            except SAMGovAPIError as e:
-                if "rate limit" in str(e).lower():
-                    logger.warning("Rate limit reached, will retry later")
-                    break
-                raise
+        # Fetch every page; pages after the first are requested concurrently
+        # Don't pass empty NAICS list to API
+        all_opportunities = client.search_all_opportunities(
+            page_size=100,
+            posted_from=posted_from,
+            posted_to=posted_to,
+            naics_codes=active_naics if active_naics else None
+        )
         
         logger.info(f"Fetched {len(all_opportunities)} opportunities")
         
@@ -533,7 +508,7 @@ def fetch_opportunity_details(self, opportunity_id: int):
         
         # Fetch latest details using the notice_id (SAM.gov expects notice ID, not solicitation number)
         notice_id = opportunity.notice_id or opportunity.solicitation_number  # Fallback for legacy data
-        details = client.get_opportunity_details(notice_id, fetch_enhanced_description=True)
+        details = client.get_opportunity_details(notice_id, fetch_enhanced_description=True, use_local=False)
         
         # Update opportunity with latest data
         opportunity.raw_data = details
@@ -717,7 +692,9 @@ def enhance_opportunity_description(self, opportunity_id: int):
                 
                 # Try fetching fresh details as fallback
                 if opportunity.notice_id:
-                    details = client.get_opportunity_details(opportunity.notice_id, fetch_enhanced_description=True)
+                    details = client.get_opportunity_details(
+                        opportunity.notice_id, fetch_enhanced_description=True, use_local=False
+                    )
                     
                     enhanced_description = details.get('description', '')
                     if enhanced_description and len(enhanced_description) > len(opportunity.description):
@@ -108,6 +108,15 @@ class TestCacheKeyGeneration(TestSAMGovClient):
         key = self.client._get_cache_key(params)
         self.assertIsInstance(key, str)
         self.assertTrue(key.startswith("sam_gov:"))
+    
+    def test_cache_key_ignores_api_key(self):
+        """Test cache key survives API key rotation and does not expose the key."""
+        params = {"title": "test", "limit": "10"}
+        key = self.client._get_cache_key(params)
+        rotated = self.client._get_cache_key({**params, "api_key": "rotated_key"})
+        
+        self.assertEqual(key, rotated)
+        self.assertNotIn("rotated_key", rotated)
 
 
 class TestRateLimiting(TestSAMGovClient):
@@ -126,25 +135,35 @@ class TestRateLimiting(TestSAMGovClient):
         mock_get.return_value = self.client.daily_limit
         self.assertFalse(self.client._check_rate_limit())
     
-    @patch('django.core.cache.cache.get')
-    @patch('django.core.cache.cache.set')
-    def test_rate_limit_increment(self, mock_set, mock_get):
-        """Test rate limit counter increments properly."""
-        mock_get.return_value = 5
+    @patch('django.core.cache.cache.add')
+    @patch('django.core.cache.cache.incr')
+    def test_rate_limit_increment(self, mock_incr, mock_add):
+        """Test rate limit counter increments atomically."""
+        mock_incr.return_value = 6
         
         self.client._increment_rate_limit()
         
-        # Should increment count by 1
-        mock_set.assert_called_once()
-        args, kwargs = mock_set.call_args
-        self.assertEqual(args[1], 6)  # 5 + 1
+        # Should increment the existing counter in place
+        mock_incr.assert_called_once_with(self.client._rate_limit_key())
+        mock_add.assert_not_called()
+    
+    @patch('django.core.cache.cache.add')
+    @patch('django.core.cache.cache.incr')
+    def test_rate_limit_increment_creates_counter(self, mock_incr, mock_add):
+        """Test the first request of the day creates the counter."""
+        mock_incr.side_effect = ValueError
+        mock_add.return_value = True
+        
+        self.client._increment_rate_limit()
+        
+        mock_add.assert_called_once_with(self.client._rate_limit_key(), 1, 86400)
     
 
 
 class TestAPIRequests(TestSAMGovClient):
     """Test API request handling."""
     
-    @patch('apps.opportunities.api_clients.sam_gov.requests.get')
+    @patch('apps.opportunities.api_clients.sam_gov.requests.Session.get')
     @patch('django.core.cache.cache.get')
     @patch('django.core.cache.cache.set')
     def test_successful_api_request(self, mock_cache_set, mock_cache_get, mock_get):
@@ -167,7 +186,7 @@ class TestAPIRequests(TestSAMGovClient):
         self.assertIn("api_key", call_args[1]["params"])
         self.assertEqual(call_args[1]["params"]["api_key"], self.api_key)
     
-    @patch('apps.opportunities.api_clients.sam_gov.requests.get')
+    @patch('apps.opportunities.api_clients.sam_gov.requests.Session.get')
     @patch('django.core.cache.cache.get')
     def test_rate_limit_error_429(self, mock_cache_get, mock_get):
         """Test handling of 429 rate limit error."""
@@ -182,7 +201,7 @@ class TestAPIRequests(TestSAMGovClient):
         
         self.assertIn("Rate limit exceeded", str(cm.exception))
     
-    @patch('apps.opportunities.api_clients.sam_gov.requests.get')
+    @patch('apps.opportunities.api_clients.sam_gov.requests.Session.get')
     @patch('django.core.cache.cache.get')
     def test_invalid_api_key_401(self, mock_cache_get, mock_get):
         """Test handling of 401 invalid API key error."""
@@ -197,7 +216,7 @@ class TestAPIRequests(TestSAMGovClient):
         
         self.assertIn("Invalid API key", str(cm.exception))
     
-    @patch('apps.opportunities.api_clients.sam_gov.requests.get')
+    @patch('apps.opportunities.api_clients.sam_gov.requests.Session.get')
     @patch('django.core.cache.cache.get')
     def test_general_api_error(self, mock_cache_get, mock_get):
         """Test handling of general API errors."""
@@ -213,7 +232,7 @@ class TestAPIRequests(TestSAMGovClient):
         
         self.assertIn("API error: 500", str(cm.exception))
     
-    @patch('apps.opportunities.api_clients.sam_gov.requests.get')
+    @patch('apps.opportunities.api_clients.sam_gov.requests.Session.get')
     @patch('django.core.cache.cache.get')
     def test_network_error(self, mock_cache_get, mock_get):
         """Test handling of network errors."""
@@ -226,7 +245,7 @@ class TestAPIRequests(TestSAMGovClient):
         
         self.assertIn("Request failed", str(cm.exception))
     
-    @patch('apps.opportunities.api_clients.sam_gov.requests.get')
+    @patch('apps.opportunities.api_clients.sam_gov.requests.Session.get')
     @patch('django.core.cache.cache.get')
     def test_timeout_error(self, mock_cache_get, mock_get):
         """Test handling of timeout errors."""
@@ -354,6 +373,97 @@ class TestNAICSFiltering(TestSAMGovClient):
         self.assertNotIn("541512", naics_codes)
 
 
+class TestPagination(TestSAMGovClient):
+    """Test fetching every page of a search."""
+    
+    @patch('apps.opportunities.api_clients.sam_gov.SAMGovClient.search_opportunities')
+    def test_search_all_opportunities_fetches_remaining_pages(self, mock_search):
+        """Test pages after the first are requested by offset and returned in order."""
+        self.client.daily_limit = 10
+        mock_search.side_effect = lambda limit, offset, **kwargs: {
+            'opportunities': [{'noticeId': f'{offset}-{i}'} for i in range(min(limit, 5 - offset))],
+            'api_total_records': 5,
+        }
+        
+        opportunities = self.client.search_all_opportunities(page_size=2, title="IT")
+        
+        self.assertEqual([opp['noticeId'] for opp in opportunities], ['0-0', '0-1', '2-0', '2-1', '4-0'])
+        self.assertEqual(sorted(call.kwargs['offset'] for call in mock_search.call_args_list), [0, 2, 4])
+        self.assertTrue(all(call.kwargs['title'] == "IT" for call in mock_search.call_args_list))
+    
+    @patch('apps.opportunities.api_clients.sam_gov.SAMGovClient.search_opportunities')
+    def test_search_all_opportunities_stops_at_rate_limit(self, mock_search):
+        """Test a rate-limited first page returns no opportunities instead of raising."""
+        mock_search.side_effect = SAMGovAPIError("Daily rate limit exceeded")
+        
+        self.assertEqual(self.client.search_all_opportunities(), [])
+    
+    @patch('apps.opportunities.api_clients.sam_gov.SAMGovClient.search_opportunities')
+    def test_search_all_opportunities_skips_batches_after_rate_limit(self, mock_search):
+        """Test no further pages are requested once a batch hits the rate limit."""
+        self.client.daily_limit = 100
+        
+        def search(limit, offset, **kwargs):
+            if offset == 2:
+                raise SAMGovAPIError("Daily rate limit exceeded")
+            return {'opportunities': [{'noticeId': f'{offset}-{i}'} for i in range(limit)], 'api_total_records': 20}
+        mock_search.side_effect = search
+        
+        opportunities = self.client.search_all_opportunities(page_size=2, max_workers=2)
+        
+        self.assertEqual([opp['noticeId'] for opp in opportunities], ['0-0', '0-1'])
+        self.assertEqual(sorted(call.kwargs['offset'] for call in mock_search.call_args_list), [0, 2, 4])
+    
+    @patch('apps.opportunities.api_clients.sam_gov.SAMGovClient.search_opportunities')
+    def test_search_all_opportunities_pages_sequentially_without_total(self, mock_search):
+        """Test a full first page without totalRecords keeps paging until a short page."""
+        self.client.daily_limit = 10
+        mock_search.side_effect = lambda limit, offset, **kwargs: {
+            'opportunities': [{'noticeId': f'{offset}-{i}'} for i in range(min(limit, 5 - offset))],
+        }
+        
+        opportunities = self.client.search_all_opportunities(page_size=2)
+        
+        self.assertEqual([opp['noticeId'] for opp in opportunities], ['0-0', '0-1', '2-0', '2-1', '4-0'])
+        self.assertEqual([call.kwargs['offset'] for call in mock_search.call_args_list], [0, 2, 4])
+
+
+class TestOpportunityDetails(TestSAMGovClient):
+    """Test single-notice lookups."""
+
+    @patch('apps.opportunities.api_clients.sam_gov.SAMGovClient._make_request')
+    def test_stored_opportunity_skips_api(self, mock_request):
+        """Test a notice already stored locally is served without a SAM.gov search."""
+        from .models import Opportunity
+        Opportunity.objects.create(
+            title="Test Opportunity", solicitation_number="SOL-2024-001", notice_id="test-notice-123",
+            description="Test opportunity description", posted_date=timezone.now(),
+            source_url="https://sam.gov/opp/test-notice-123", raw_data=self.sample_opportunity
+        )
+
+        details = self.client.get_opportunity_details("test-notice-123", fetch_enhanced_description=False)
+
+        self.assertEqual(details, self.sample_opportunity)
+        mock_request.assert_not_called()
+
+    @patch('apps.opportunities.api_clients.sam_gov.SAMGovClient._make_request')
+    def test_search_widens_window_on_miss(self, mock_request):
+        """Test the posted-date window only widens when the narrower search misses."""
+        mock_request.side_effect = [
+            {'opportunitiesData': []},
+            {'opportunitiesData': [self.sample_opportunity]},
+        ]
+
+        details = self.client.get_opportunity_details("test-notice-123", fetch_enhanced_description=False)
+
+        self.assertEqual(details['noticeId'], "test-notice-123")
+        self.assertEqual(mock_request.call_count, 2)
+        posted_from = [
+            datetime.strptime(call.args[0]['postedFrom'], '%m/%d/%Y') for call in mock_request.call_args_list
+        ]
+        self.assertGreater(posted_from[0], posted_from[1])
+
+
 class TestAPIDocumentationCompliance(TestSAMGovClient):
     """Test compliance with SAM.gov API documentation."""
     
@@ -71,6 +71,46 @@ app.conf.beat_schedule = {
         'task': 'apps.agents.tasks_phase4.cleanup_completed_sessions',
         'schedule': crontab(hour=4, minute=0),
     },
+    # Opportunity response-date reminders daily
+    'check-opportunity-deadline-notifications': {
+        'task': 'apps.notifications.tasks.check_opportunity_deadline_notifications',
+        'schedule': crontab(hour=7, minute=0),
+    },
+    # Notifications: deliver pending notifications every minute
+    'process-pending-notifications': {
+        'task': 'apps.notifications.tasks.process_pending_notifications',
+        'schedule': 60.0,
+    },
+    # Notifications: task/milestone deadline checks every hour
+    'check-deadline-notifications': {
+        'task': 'apps.notifications.tasks.check_deadline_notifications',
+        'schedule': crontab(hour='*', minute=0),
+    },
+    # Notifications: daily digests at 8 AM
+    'create-daily-digests': {
+        'task': 'apps.notifications.tasks.create_daily_digests',
+        'schedule': crontab(hour=8, minute=0),
+    },
+    # Notifications: weekly digests Monday at 8 AM
+    'create-weekly-digests': {
+        'task': 'apps.notifications.tasks.create_weekly_digests',
+        'schedule': crontab(hour=8, minute=0, day_of_week=1),
+    },
+    # Notifications: alert rules every 15 minutes
+    'process-alert-rules': {
+        'task': 'apps.notifications.tasks.process_alert_rules',
+        'schedule': crontab(minute='*/15'),
+    },
+    # Notifications: clean up expired notifications daily
+    'cleanup-expired-notifications': {
+        'task': 'apps.notifications.tasks.cleanup_expired_notifications',
+        'schedule': crontab(hour=2, minute=0),
+    },
+    # Notifications: analytics snapshot daily
+    'generate-notification-analytics': {
+        'task': 'apps.notifications.tasks.generate_notification_analytics',
+        'schedule': crontab(hour=1, minute=0),
+    },
 }
 
 # Task routing
@@ -79,6 +119,11 @@ app.conf.task_routes = {
     'apps.opportunities.tasks.*': {'queue': 'opportunities'},
     'apps.documents.tasks.*': {'queue': 'documents'},
     'apps.ai_integration.tasks.*': {'queue': 'ai'},
+    'apps.notifications.tasks.*': {'queue': 'notifications'},
+    # SMTP/HTTP sends go to a gevent worker that multiplexes many sockets per process (see README for DB connection limits)
+    'apps.notifications.tasks.send_notification_email': {'queue': 'notif_io'},
+    'apps.notifications.tasks.send_webhook_notification': {'queue': 'notif_io'},
+    'apps.notifications.tasks.send_webhook_batch': {'queue': 'notif_io'},
     # Phase 3: Specialized queues for document processing
     'apps.opportunities.tasks_phase3.process_single_opportunity_documents': {'queue': 'document_processing'},
     'apps.opportunities.tasks_phase3.aggregate_opportunity_data_async': {'queue': 'data_aggregation'},
@@ -97,6 +142,12 @@ app.conf.task_routes = {
     'apps.agents.tasks_phase4.health_check_agent_system': {'queue': 'monitoring'},
 }
 
+# Per-worker token-bucket limits so notification bursts (e.g. nightly checks) don't flood the DB
+app.conf.task_annotations = {
+    'apps.notifications.tasks.create_queued_notifications': {'rate_limit': '50/s'},
+    'apps.notifications.tasks.deliver_notification': {'rate_limit': '50/s'},
+}
+
 # Task time limits
 app.conf.task_time_limit = 3600  # 1 hour hard limit
 app.conf.task_soft_time_limit = 3000  # 50 minutes soft limit
@@ -106,7 +157,8 @@ app.conf.result_backend = 'redis://localhost:6379/0'
 app.conf.result_expires = 3600  # Results expire after 1 hour
 
 # Worker configuration
-app.conf.worker_prefetch_multiplier = 4
+# Reserve one task per process so short sends never queue behind a long task already prefetched
+app.conf.worker_prefetch_multiplier = 1
 app.conf.worker_max_tasks_per_child = 100
 
 @app.task(bind=True)